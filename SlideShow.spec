@@ -12,6 +12,7 @@ a = Analysis(
         'PIL.Image', 
         'PIL.ImageTk',
         'PIL.ExifTags',
+        'PIL.ImageCms',
         'tkinter',
         'tkinter.ttk',
         'tkinter.filedialog',
@@ -0,0 +1,211 @@
+"""
+Archive sources for SlideShow
+Lets a ZIP or uncompressed TAR archive be used in place of an image directory.
+
+Members are listed from the archive's index (the ZIP central directory, or
+the TAR headers read once up front) without extracting anything. Stored
+(uncompressed) members are read straight out of a memory map of the
+archive, so opening any slide is a random access and no member is copied
+into memory before the decoder asks for it. Compressed ZIP members are
+inflated into memory when opened.
+
+Opened archives are cached, up to MAX_CACHED_ARCHIVES; older ones are
+closed as newer ones are opened, and close_archives() closes them all when
+a viewer quits. A closed archive reopens by itself if its members are read
+again.
+"""
+
+import io
+import mmap
+import os
+import struct
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+from PIL import Image
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar')
+
+# Archives kept open; the least recently listed beyond this are closed
+MAX_CACHED_ARCHIVES = 4
+
+# Size of the fixed part of a ZIP local file header
+_ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+def is_archive(path):
+    """Return True if path is a ZIP or uncompressed TAR file SlideShow can play from"""
+    path = str(path)
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+class MappedMemberReader(io.RawIOBase):
+    """Read-only, seekable file object over a slice of a memory-mapped archive"""
+
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.view[self.position:self.position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+class ImageArchive:
+    """An opened archive, shared by its members. Reopens its file handles as needed after close()."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self.is_zip = zipfile.is_zipfile(self.path)
+        self.zip = None
+        self._map = None
+        self._file = None
+        self.members = []
+        if self.is_zip:
+            self._index_zip()
+        else:
+            self._index_tar()
+
+    def _index_zip(self):
+        self.zip = zipfile.ZipFile(self.path)
+        for info in self.zip.infolist():
+            if not info.is_dir():
+                self.members.append(ArchiveMember(self, info.filename, info.file_size, info))
+
+    def _index_tar(self):
+        try:
+            # "r:" refuses compressed archives, which cannot be read at random offsets
+            with tarfile.open(self.path, "r:") as tar:
+                for info in tar.getmembers():
+                    if info.isfile():
+                        self.members.append(ArchiveMember(self, info.name, info.size, info.offset_data))
+        except tarfile.ReadError as e:
+            raise ValueError(f"{self.path} is not a ZIP or uncompressed TAR archive: {e}")
+
+    def _mapped(self):
+        with self.lock:
+            if self._map is None:
+                self._file = open(self.path, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def _zip_data_offset(self, info):
+        """Offset of a ZIP member's data, from its local header"""
+        mapped = self._mapped()
+        header = _ZIP_LOCAL_HEADER.unpack_from(mapped, info.header_offset)
+        name_length, extra_length = header[-2], header[-1]
+        return info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length
+
+    def open_member(self, member):
+        """Return a seekable binary file object for member's contents"""
+        location = member.location
+        if not self.is_zip:
+            start = location
+        elif location.compress_type == zipfile.ZIP_STORED:
+            start = self._zip_data_offset(location)
+        else:
+            with self.lock:
+                if self.zip is None:
+                    self.zip = zipfile.ZipFile(self.path)
+                return io.BytesIO(self.zip.read(location))
+        view = memoryview(self._mapped())[start:start + member.size]
+        return io.BufferedReader(MappedMemberReader(view))
+
+    def close(self):
+        """Close the archive's file handles and memory map"""
+        with self.lock:
+            if self.zip is not None:
+                self.zip.close()
+                self.zip = None
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    # A member is still being read; the map goes with its last reader
+                    pass
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class ArchiveMember:
+    """An image inside an archive. Stands in for a Path in the image list."""
+
+    def __init__(self, archive, name, size, location):
+        self.archive = archive
+        self.name = name
+        self.size = size
+        # ZipInfo for ZIP members, data offset for TAR members
+        self.location = location
+
+    @property
+    def suffix(self):
+        return os.path.splitext(self.name)[1]
+
+    def is_file(self):
+        return True
+
+    def open(self):
+        return self.archive.open_member(self)
+
+    def __str__(self):
+        return f"{self.archive.path}/{self.name}"
+
+    def __repr__(self):
+        return f"ArchiveMember({self.archive.path!r}, {self.name!r})"
+
+_archives = OrderedDict()
+_archives_lock = threading.Lock()
+
+def list_archive_members(archive_path):
+    """Return the members of archive_path, opening (and caching) the archive once"""
+    path = os.path.abspath(str(archive_path))
+    stat = os.stat(path)
+    # Re-index if the archive has been replaced since it was last opened
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    closing = []
+    with _archives_lock:
+        if key not in _archives:
+            closing += [_archives.pop(k) for k in list(_archives) if k[0] == path]
+            _archives[key] = ImageArchive(path)
+        _archives.move_to_end(key)
+        while len(_archives) > MAX_CACHED_ARCHIVES:
+            closing.append(_archives.popitem(last=False)[1])
+        members = list(_archives[key].members)
+    for archive in closing:
+        archive.close()
+    return members
+
+def close_archives():
+    """Close every cached archive, e.g. when a viewer quits"""
+    with _archives_lock:
+        closing = list(_archives.values())
+        _archives.clear()
+    for archive in closing:
+        archive.close()
+
+def open_image(source):
+    """Image.open() for either a filesystem path or an ArchiveMember"""
+    if isinstance(source, ArchiveMember):
+        return Image.open(source.open())
+    return Image.open(source)
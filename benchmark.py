@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for SlideShow
+Measures the image pipeline without opening any windows
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageChops, ImageStat
+
+from renderer import QUALITY_REDUCING_GAPS, SlideRenderer, get_image_files, render_canvas
+from transitions import TRANSITIONS
+
+SCREEN_SIZES = {
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+def parse_size(value):
+    """Parse a WIDTHxHEIGHT string or one of the SCREEN_SIZES names"""
+    if value.lower() in SCREEN_SIZES:
+        return SCREEN_SIZES[value.lower()]
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size '{value}'. Use WIDTHxHEIGHT, 1080p or 4k.")
+
+def make_synthetic_corpus(directory, count=8, size=(6000, 4000)):
+    """Write count detailed JPEGs to directory and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        width, height = size if i % 3 else (size[1], size[0])
+        # Noise on top of a gradient gives the resampler real detail to work on
+        gradient = Image.radial_gradient("L").resize((width, height))
+        noise = Image.effect_noise((width, height), 40 + i * 5)
+        mandel = Image.effect_mandelbrot((width, height), (-2.0, -1.2, 0.8, 1.2), 64 + i * 16)
+        img = Image.merge("RGB", (gradient, noise, mandel))
+        img.save(os.path.join(directory, f"synthetic_{i:03d}.jpg"), quality=92)
+    return get_image_files(directory)
+
+def psnr(reference, candidate):
+    """Peak signal-to-noise ratio of candidate against reference, in dB"""
+    diff = ImageChops.difference(reference.convert("RGB"), candidate.convert("RGB"))
+    mse = sum(rms * rms for rms in ImageStat.Stat(diff).rms) / 3
+    if mse == 0:
+        return float("inf")
+    return 10 * math.log10(255 * 255 / mse)
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, milliseconds), hiding the pipeline's log output"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+    return result, elapsed
+
+def benchmark_resampling(image_files, screen_size):
+    """Time every quality tier and compare its output with the "best" tier"""
+    print(f"\nResampling tiers at {screen_size[0]}x{screen_size[1]} ({len(image_files)} images)")
+    print(f"{'tier':<10} {'mean ms':>9} {'max ms':>9} {'min PSNR':>9} {'mean PSNR':>10}")
+    references = {}
+    for quality in ["best"] + [q for q in QUALITY_REDUCING_GAPS if q != "best"]:
+        times = []
+        scores = []
+        for img_path in image_files:
+            canvas, elapsed = timed(render_canvas, img_path, screen_size, quality)
+            times.append(elapsed)
+            if quality == "best":
+                references[img_path] = canvas
+            else:
+                scores.append(psnr(references[img_path], canvas))
+        if scores:
+            finite = [s for s in scores if s != float("inf")] or [99.0]
+            quality_cols = f"{min(scores):>9.2f} {sum(finite) / len(finite):>10.2f}"
+        else:
+            quality_cols = f"{'ref':>9} {'ref':>10}"
+        print(f"{quality:<10} {sum(times) / len(times):>9.1f} {max(times):>9.1f} {quality_cols}")
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def benchmark_transitions(image_files, screen_size, frames=30, fps=30):
+    """Time the renderer's transition setup and frames for every effect against the per-frame budget.
+
+    This covers the PIL work only; the Tk blit (and, at a reduced scale,
+    Tk's zoom back to full size) comes on top of it. Effects run at the
+    viewers' automatic scale, which the first transition settles against
+    the budget.
+    """
+    budget = 1000 / fps
+    print(f"\nTransitions at {screen_size[0]}x{screen_size[1]} ({frames} frames, budget {budget:.1f} ms/frame)")
+    print(f"{'effect':<10} {'setup ms':>9} {'prepare ms':>11} {'scale':>6} {'mean ms':>9} {'p95 ms':>9} "
+          f"{'max ms':>9}  budget")
+    for name in TRANSITIONS:
+        # The same engine the viewers drive, with the same frame budget
+        renderer, setup_ms = timed(SlideRenderer, image_files, screen_size, transition=name)
+        first, _ = timed(renderer.load_slide, 0)
+        slide, _ = timed(renderer.load_slide, 1 % len(image_files))
+        _, prepare_ms = timed(renderer.start_transition, first[0], slide, budget)
+        frame_times = []
+        for step in range(1, frames):
+            _, elapsed = timed(renderer.transition_frame, step / frames)
+            frame_times.append(elapsed)
+        timed(renderer.close)
+        p95 = percentile(frame_times, 0.95)
+        verdict = "ok" if p95 <= budget else "OVER"
+        print(f"{name:<10} {setup_ms:>9.1f} {prepare_ms:>11.1f} {'1/' + str(renderer.active_scale):>6} "
+              f"{sum(frame_times) / len(frame_times):>9.1f} {p95:>9.1f} {max(frame_times):>9.1f}  {verdict}")
+
+BENCHMARKS = {
+    "resampling": benchmark_resampling,
+    "transitions": benchmark_transitions,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SlideShow image pipeline")
+    parser.add_argument("directory", nargs="?", help="Image directory to use as the corpus (default: synthetic images)")
+    parser.add_argument("--size", type=parse_size, action="append",
+                        help="Screen size to render at, e.g. 1920x1080, 1080p or 4k (repeatable)")
+    parser.add_argument("--synthetic", type=int, default=8, help="Number of synthetic images when no directory is given")
+    parser.add_argument("--only", choices=list(BENCHMARKS), action="append",
+                        help="Run only this benchmark (repeatable, default: all)")
+    args = parser.parse_args()
+    sizes = args.size or [SCREEN_SIZES["1080p"], SCREEN_SIZES["4k"]]
+    benchmarks = args.only or list(BENCHMARKS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.directory:
+            image_files = get_image_files(args.directory)
+        else:
+            print(f"Generating {args.synthetic} synthetic images...")
+            image_files = make_synthetic_corpus(tmp, args.synthetic)
+        if not image_files:
+            print("No image files found.")
+            sys.exit(1)
+        for size in sizes:
+            for name in benchmarks:
+                BENCHMARKS[name](image_files, size)
+
+if __name__ == "__main__":
+    main()
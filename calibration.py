@@ -0,0 +1,187 @@
+"""
+Startup self-calibration for SlideShow
+The same defaults do not suit a Raspberry Pi-class box and an 8-core
+workstation. On first start on a machine and screen size, a short run
+(about a second and a half on a single desktop core, a few seconds on a
+Raspberry Pi-class box; the window waits for it) measures what this host
+can do:
+    decode      a camera-sized JPEG, from memory so the disk does not count
+    prepare     load and fit that image to the screen, once per quality tier
+    blend       one dissolve frame at screen size
+    blit        putting that frame into a Tk photo image
+
+and picks settings from the results:
+    frames per second   as many dissolve frames as blend + blit fit into,
+                        with headroom, between MIN_FPS and MAX_FPS
+    quality             the best tier that prepares a slide within
+                        PREPARE_BUDGET_MS, else fast
+    workers             threads rendering upcoming slides: every core but
+                        one, which is left to the Tk thread, up to MAX_WORKERS
+    prefetch depth      one slide per worker plus one waiting, as far as
+                        PREFETCH_MEMORY_MB of rendered slides allows
+
+Measurements and choices are kept in calibration.json next to the
+launcher's settings, keyed by machine and screen size, so later starts
+reuse them at once. Options given explicitly always win over calibrated
+values; --recalibrate measures again and --no-calibrate uses the fixed
+defaults.
+"""
+
+import io
+import json
+import math
+import os
+import platform
+import time
+
+from PIL import Image, ImageTk
+
+from renderer import render_fitted
+from transitions import create_transition
+
+# Bump when the measurements or the choices change, to calibrate again
+CALIBRATION_VERSION = 1
+CALIBRATION_IMAGE_SIZE = (4032, 3024)
+MIN_FPS = 10
+MAX_FPS = 60
+# Part of each frame interval blend + blit may use; the rest is for Tk and the prefetch threads
+FRAME_HEADROOM = 0.75
+PREPARE_BUDGET_MS = 500
+MAX_WORKERS = 4
+PREFETCH_MEMORY_MB = 256
+# Quality tiers from best to fastest
+QUALITY_TIERS = ("best", "balanced", "fast")
+
+def default_calibration_path():
+    """The calibration file, next to the launcher's settings"""
+    return os.path.join(os.path.expanduser("~/Library/Application Support/SlideShow"), "calibration.json")
+
+def machine_key(screen_size):
+    """What calibration results are kept by: this machine and the screen size"""
+    return (f"{platform.node()} {platform.machine()} {os.cpu_count() or 1} cpus "
+            f"{screen_size[0]}x{screen_size[1]}")
+
+def dissolve_frames(frames_per_second, dissolve_time_ms):
+    """Number of frames for a transition of dissolve_time_ms at frames_per_second"""
+    return max(1, round(frames_per_second * dissolve_time_ms / 1000))
+
+def synthetic_jpeg(size=CALIBRATION_IMAGE_SIZE):
+    """Encoded bytes of a detailed camera-sized JPEG"""
+    # Noise on a gradient, so neither the codec nor the resampler has it easy.
+    # A tile of noise repeated across the image is as hard to compress as
+    # noise generated for every pixel, in a fraction of the time.
+    tile = Image.effect_noise((max(1, size[0] // 8), max(1, size[1] // 8)), 48)
+    noise = Image.new("L", size)
+    for x in range(0, size[0], tile.width):
+        for y in range(0, size[1], tile.height):
+            noise.paste(tile, (x, y))
+    gradient = Image.radial_gradient("L").resize(size)
+    buffer = io.BytesIO()
+    Image.merge("RGB", (gradient, noise, noise.transpose(Image.Transpose.ROTATE_180))).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def elapsed_ms(function, *args, **kwargs):
+    """Call function and return (result, milliseconds)"""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+def measure(screen_size, root=None):
+    """Time decode, prepare (per quality tier), blend and, given a Tk root, blit at screen_size"""
+    data = synthetic_jpeg()
+
+    def decode():
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+
+    _, decode_ms = elapsed_ms(decode)
+    prepare_ms = {}
+    fitted = None
+    for quality in QUALITY_TIERS:
+        # One run each; the tiers are far enough apart that a second run rarely changes the choice
+        fitted, prepare_ms[quality] = elapsed_ms(render_fitted, io.BytesIO(data), screen_size, quality, quiet=True)
+    canvas = Image.new("RGB", screen_size)
+    canvas.paste(fitted.convert("RGB"), ((screen_size[0] - fitted.width) // 2, (screen_size[1] - fitted.height) // 2))
+    dissolve = create_transition("dissolve", screen_size)
+    dissolve.prepare(Image.new("RGB", screen_size), canvas)
+    frames = []
+    blend_ms = []
+    for step in range(1, 4):
+        frame, ms = elapsed_ms(dissolve.frame, step / 4)
+        frames.append(frame)
+        blend_ms.append(ms)
+    blit_ms = []
+    if root is not None:
+        photo = ImageTk.PhotoImage(frames[0], master=root)
+        for frame in frames:
+            _, ms = elapsed_ms(photo.paste, frame)
+            blit_ms.append(ms)
+    return {
+        "decode_ms": round(decode_ms, 1),
+        "prepare_ms": {quality: round(ms, 1) for quality, ms in prepare_ms.items()},
+        "blend_ms": round(min(blend_ms), 1),
+        "blit_ms": round(min(blit_ms), 1) if blit_ms else None,
+    }
+
+def choose(measurements, screen_size):
+    """Pick frames per second, quality, workers and prefetch depth from measurements"""
+    frame_ms = measurements["blend_ms"] + (measurements["blit_ms"] or 0)
+    fps = int(FRAME_HEADROOM * 1000 / frame_ms) if frame_ms > 0 else MAX_FPS
+    fps = max(MIN_FPS, min(MAX_FPS, fps))
+    quality = next((tier for tier in QUALITY_TIERS
+                    if measurements["prepare_ms"].get(tier, math.inf) <= PREPARE_BUDGET_MS), "fast")
+    workers = max(1, min(MAX_WORKERS, (os.cpu_count() or 1) - 1))
+    slide_mb = screen_size[0] * screen_size[1] * 4 / 1048576
+    depth = max(1, min(workers + 1, int(PREFETCH_MEMORY_MB / slide_mb)))
+    return {"frames_per_second": fps, "quality": quality, "workers": workers, "prefetch_depth": depth}
+
+class Calibration:
+    """Calibrated settings per machine and screen size, measured once and kept in a JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable calibration file {path}: {e}")
+
+    def settings(self, screen_size, root=None, recalibrate=False):
+        """Return the settings for screen_size, calibrating first if there are none yet"""
+        key = machine_key(screen_size)
+        entry = self.entries.get(key)
+        if entry is not None and entry.get("version") == CALIBRATION_VERSION and not recalibrate:
+            return entry["settings"]
+        print(f"Calibrating for {screen_size[0]}x{screen_size[1]} on this machine...")
+        try:
+            measurements = measure(screen_size, root)
+        except Exception as e:
+            # Never worth failing to start over; the fixed defaults still work
+            print(f"Calibration failed, using the defaults: {e}")
+            return {}
+        settings = choose(measurements, screen_size)
+        print(f"Calibration: decode {measurements['decode_ms']:.0f} ms, prepare "
+              f"{', '.join(f'{tier} {ms:.0f} ms' for tier, ms in measurements['prepare_ms'].items())}, "
+              f"blend {measurements['blend_ms']:.1f} ms, blit "
+              f"{'n/a' if measurements['blit_ms'] is None else format(measurements['blit_ms'], '.1f') + ' ms'}")
+        print(f"Calibration: {settings['frames_per_second']} fps transitions, {settings['quality']} quality, "
+              f"{settings['workers']} workers, prefetching {settings['prefetch_depth']} slides")
+        self.entries[key] = {"version": CALIBRATION_VERSION, "measured": time.strftime("%Y-%m-%d %H:%M:%S"),
+                             "measurements": measurements, "settings": settings}
+        self.save()
+        return settings
+
+    def save(self):
+        if not self.path:
+            return
+        # Written to a temporary file and renamed, so a crash never leaves half a file
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(temporary, "w") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"Could not save calibration file {self.path}: {e}")
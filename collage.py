@@ -0,0 +1,143 @@
+"""
+Collage layouts for SlideShow
+Shows several images per slide - two portraits side by side, 2x2 or 3x3
+grids - for event walls.
+
+The images of a slide are grouped into a CollagePage, which stands in for a
+single path in the viewers' image lists, so ordering, prefetching, recent
+slides and synchronized playback treat a collage exactly like one image,
+and its transitions cost the same.
+
+Layout only needs every image's size, which Pillow reads from the file
+header without decoding any pixels. Rows are justified: the images of a row
+are scaled to one height so that, side by side, they fill the screen width,
+and rows are shrunk together if they do not fit its height. Knowing every
+cell's size up front, the cells are then decoded and resized in parallel,
+each straight to its cell size (JPEG drafts included), and pasted into one
+screen canvas.
+"""
+
+import os
+
+from PIL import Image
+
+from archive_source import open_image
+
+# Named layouts: name -> (columns, rows)
+NAMED_LAYOUTS = {
+    "2up": (2, 1),
+}
+
+def parse_layout(value):
+    """Return (columns, rows) for '2up', or a grid given as COLUMNSxROWS such as 2x2"""
+    if value in NAMED_LAYOUTS:
+        return NAMED_LAYOUTS[value]
+    try:
+        columns, rows = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid layout '{value}'. Use 2up or COLUMNSxROWS, e.g. 2x2 or 3x3.")
+    if columns < 1 or rows < 1:
+        raise ValueError(f"Invalid layout '{value}'. Columns and rows must be at least 1.")
+    return columns, rows
+
+class CollagePage:
+    """The images shown together on one slide. Stands in for a Path in the image list."""
+
+    def __init__(self, members, columns):
+        self.members = members
+        self.columns = columns
+
+    @property
+    def name(self):
+        if len(self.members) == 1:
+            return self.members[0].name
+        return f"{self.members[0].name} + {len(self.members) - 1} more"
+
+    @property
+    def suffix(self):
+        return ""
+
+    def is_file(self):
+        return True
+
+    def __str__(self):
+        return ", ".join(str(member) for member in self.members)
+
+def group_pages(image_files, columns, rows):
+    """Split image_files into CollagePages of up to columns * rows images"""
+    per_page = columns * rows
+    return [CollagePage(image_files[i:i + per_page], columns) for i in range(0, len(image_files), per_page)]
+
+def header_size(source):
+    """Return the displayed (width, height) of source from its header, without decoding it"""
+    # Imported here: renderer renders collages through this module
+    from renderer import exif_orientation
+    with open_image(source) as img:
+        width, height = img.size
+        # Turned sideways by its EXIF orientation
+        if exif_orientation(img) in (5, 6, 7, 8):
+            return height, width
+        return width, height
+
+def layout_cells(sizes, columns, screen_size, gutter):
+    """Return a (left, top, width, height) cell for each image size, in justified rows of columns"""
+    screen_width, screen_height = screen_size
+    rows = [sizes[i:i + columns] for i in range(0, len(sizes), columns)]
+    row_heights = []
+    for row in rows:
+        ratios = sum(width / height for width, height in row)
+        # A short last row is sized as if it were full, so its images are not blown up
+        ratios *= columns / len(row)
+        row_heights.append((screen_width - gutter * (columns - 1)) / ratios)
+    available = screen_height - gutter * (len(rows) - 1)
+    scale = min(1.0, available / sum(row_heights))
+    row_heights = [height * scale for height in row_heights]
+    top = (screen_height - sum(row_heights) - gutter * (len(rows) - 1)) / 2
+    cells = []
+    for row, row_height in zip(rows, row_heights):
+        widths = [row_height * width / height for width, height in row]
+        left = (screen_width - sum(widths) - gutter * (len(row) - 1)) / 2
+        for width in widths:
+            cells.append((int(left), int(top), max(1, int(width)), max(1, int(row_height))))
+            left += width + gutter
+        top += row_height + gutter
+    return cells
+
+def render_collage(page, screen_size, quality, display_profile=None, executor=None):
+    """Render a CollagePage onto one black screen-sized RGBA canvas, resizing its cells on executor"""
+    from renderer import render_fitted
+
+    gutter = max(2, screen_size[1] // 135)
+    sizes = []
+    for member in page.members:
+        try:
+            sizes.append(header_size(member))
+        except Exception as e:
+            print(f"Error reading {member}: {e}")
+            sizes.append((1, 1))
+    cells = layout_cells(sizes, page.columns, screen_size, gutter)
+    print(f"Collage of {len(cells)} images: cells {', '.join(f'{w}x{h}' for _, _, w, h in cells)}")
+
+    def render_cell(member, cell):
+        try:
+            return render_fitted(member, cell[2:], quality, display_profile)
+        except Exception as e:
+            print(f"Error loading image {member}: {e}")
+            return None
+
+    if executor is None:
+        images = [render_cell(member, cell) for member, cell in zip(page.members, cells)]
+    else:
+        images = list(executor.map(render_cell, page.members, cells))
+    canvas = Image.new('RGBA', screen_size, (0, 0, 0, 255))
+    for img, (left, top, width, height) in zip(images, cells):
+        if img is None:
+            continue
+        # Centered in its cell, which it fills up to rounding
+        offset = (left + (width - img.width) // 2, top + (height - img.height) // 2)
+        canvas.paste(img, offset, mask=img if img.mode in ('RGBA', 'LA') else None)
+    return canvas
+
+def cell_workers():
+    """Threads used to resize the cells of a collage"""
+    return max(1, min(9, os.cpu_count() or 1))
@@ -0,0 +1,113 @@
+"""
+Color management for SlideShow
+Converts images with embedded ICC profiles to the display profile (sRGB by default).
+Images without a profile are taken to be sRGB, as cameras and browsers do,
+and are converted too when the display profile is something else.
+
+Building a color transform is far more expensive than applying one, and a
+show usually contains only a handful of distinct profiles (sRGB, Adobe RGB,
+Display P3, ...), so transforms are cached by a hash of the source profile. They are built
+outside the cache's lock, so one slow build never holds up the other
+render threads.
+Callers apply the transform after resizing, so the cost of the conversion
+scales with the screen size rather than the camera resolution. CMYK images
+are resized as CMYK and converted to RGB here through their CMYK profile,
+which is both faster and more faithful than Pillow's naive CMYK to RGB.
+"""
+
+import hashlib
+import io
+import threading
+
+try:
+    from PIL import ImageCms
+except ImportError:  # Pillow built without LittleCMS
+    ImageCms = None
+
+_transforms = {}
+_display_profiles = {}
+_lock = threading.Lock()
+
+def get_icc_profile(img):
+    """Return the embedded ICC profile bytes of img, or None"""
+    return img.info.get("icc_profile") or None
+
+def _load_display_profile(display_profile):
+    """Return (profile, digest) for a profile path, or for sRGB when None"""
+    if display_profile not in _display_profiles:
+        if display_profile:
+            profile = ImageCms.ImageCmsProfile(display_profile)
+        else:
+            profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB"))
+        digest = hashlib.sha1(profile.tobytes()).hexdigest()
+        _display_profiles[display_profile] = (profile, digest)
+    return _display_profiles[display_profile]
+
+def display_profile_digest(display_profile=None):
+    """Identify the display profile (a path, or None for sRGB), e.g. for caches of converted images"""
+    if ImageCms is None:
+        # Nothing is converted without LittleCMS
+        return None
+    with _lock:
+        return _load_display_profile(display_profile)[1]
+
+def _transform_key(icc_profile, mode, display_profile):
+    # Untagged images share one key: they are all assumed to be sRGB
+    return (hashlib.sha1(icc_profile).hexdigest() if icc_profile else None, mode, display_profile)
+
+def _build_transform(source, source_digest, mode, display, display_digest):
+    """Build the transform from the source profile to the display profile, or None if not needed"""
+    if source_digest == display_digest:
+        return None
+    # The profile has to describe the pixels as they are at this point in the pipeline
+    color_space = source.profile.xcolor_space.strip()
+    if color_space == "RGB" and mode in ("RGB", "RGBA"):
+        return ImageCms.buildTransform(source, display, mode, mode,
+                                       renderingIntent=ImageCms.Intent.PERCEPTUAL)
+    if color_space == "CMYK" and mode == "CMYK":
+        return ImageCms.buildTransform(source, display, "CMYK", "RGB",
+                                       renderingIntent=ImageCms.Intent.PERCEPTUAL)
+    return None
+
+def _get_transform(icc_profile, mode, display_profile):
+    """Return a cached transform from icc_profile (None for sRGB) to the display profile, or None if not needed"""
+    key = _transform_key(icc_profile, mode, display_profile)
+    with _lock:
+        if key in _transforms:
+            return _transforms[key]
+        display, display_digest = _load_display_profile(display_profile)
+        if icc_profile:
+            source, source_digest = None, key[0]
+        else:
+            source, source_digest = _load_display_profile(None)
+    if source is None:
+        source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+    # Another thread may build the same transform meanwhile; the first one stored is kept
+    transform = _build_transform(source, source_digest, mode, display, display_digest)
+    with _lock:
+        return _transforms.setdefault(key, transform)
+
+def convert_to_display(img, icc_profile, display_profile=None):
+    """Convert img from its embedded icc_profile to the display profile.
+
+    img must be RGB, RGBA or CMYK (and ideally already screen-sized); CMYK
+    images with a CMYK profile come back as RGB. display_profile is a path
+    to an ICC file, or None for sRGB. Images without a profile are treated
+    as sRGB; images whose profile matches the display are returned
+    unchanged.
+    """
+    if ImageCms is None or img.mode not in ("RGB", "RGBA", "CMYK"):
+        return img
+    if not icc_profile and (not display_profile or img.mode == "CMYK"):
+        # sRGB on an sRGB display; untagged CMYK has no profile to go through
+        return img
+    try:
+        transform = _get_transform(icc_profile, img.mode, display_profile)
+    except Exception as e:
+        print(f"Could not build color transform: {e}")
+        with _lock:
+            _transforms[_transform_key(icc_profile, img.mode, display_profile)] = None
+        return img
+    if transform is None:
+        return img
+    return ImageCms.applyTransform(img, transform)
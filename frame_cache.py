@@ -0,0 +1,190 @@
+"""
+Pre-rendered frame cache for SlideShow
+Renders every slide of a show once, at a fixed screen size, into a single
+memory-mapped file that the viewers can page frames out of.
+
+File layout:
+    8 bytes   magic
+    8 bytes   offset of the JSON index (little-endian)
+    ...       frames, raw RGBA, width * height * 4 bytes each
+    ...       JSON index: screen size, quality tier and display profile
+              digest, and per source its frame offset, mtime and size
+
+Frames are stored as RGBA rather than RGB because Pillow can only wrap a
+buffer without copying it for 4-byte pixel layouts; the alpha channel is
+always opaque, exactly like a canvas from render_canvas().
+"""
+
+import json
+import mmap
+import os
+import struct
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PIL import Image
+
+from archive_source import ArchiveMember, is_archive
+from color_management import display_profile_digest
+
+MAGIC = b"SSFRAME1"
+_HEADER = struct.Struct("<8sQ")
+CACHE_FILE_NAME = ".slideshow_frames"
+
+def default_cache_path(directory):
+    """Where the frame cache of a directory (or archive) lives by default"""
+    if is_archive(directory):
+        return str(directory) + ".frames"
+    return os.path.join(str(directory), CACHE_FILE_NAME)
+
+def source_stamp(source):
+    """Return (key, mtime_ns, size) identifying the current version of a source"""
+    if isinstance(source, ArchiveMember):
+        # Archive members have no usable mtime of their own; the archive's will do
+        stat = os.stat(source.archive.path)
+        return source.name, stat.st_mtime_ns, source.size
+    stat = os.stat(source)
+    return source.name, stat.st_mtime_ns, stat.st_size
+
+class FrameCache:
+    """Read access to a frame cache file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a SlideShow frame cache")
+        index = json.loads(self._map[index_offset:].decode("utf-8"))
+        self.size = tuple(index["size"])
+        self.quality = index.get("quality")
+        self.display_profile = index.get("display_profile")
+        self.entries = index["entries"]
+        self.frame_bytes = self.size[0] * self.size[1] * 4
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path, screen_size, quality, display_profile=None):
+        """Open the cache at path if it was rendered for this screen_size, quality and display_profile, else None"""
+        if not path or not os.path.isfile(path):
+            return None
+        try:
+            cache = cls(path)
+            digest = display_profile_digest(display_profile)
+        except Exception as e:
+            print(f"Ignoring unreadable frame cache {path}: {e}")
+            return None
+        if cache.size != tuple(screen_size):
+            mismatch = f"is for {cache.size[0]}x{cache.size[1]}, screen is {screen_size[0]}x{screen_size[1]}"
+        elif cache.quality != quality:
+            mismatch = f"was rendered at {cache.quality} quality, the show uses {quality}"
+        elif cache.display_profile != digest:
+            mismatch = f"was rendered for another display profile than {display_profile or 'sRGB'}"
+        else:
+            mismatch = None
+        if mismatch:
+            print(f"Frame cache {path} {mismatch}; rendering live")
+            cache.close()
+            return None
+        print(f"Using frame cache {path} ({len(cache.entries)} frames)")
+        return cache
+
+    def get(self, source):
+        """Return the cached canvas for source, or None if it is missing or stale.
+
+        The returned image is a read-only view of the mapped file; nothing is
+        copied until something modifies it.
+        """
+        try:
+            key, mtime_ns, size = source_stamp(source)
+        except OSError:
+            return None
+        entry = self.entries.get(key)
+        if entry is None or entry["mtime_ns"] != mtime_ns or entry["size"] != size:
+            self.misses += 1
+            return None
+        self.hits += 1
+        view = memoryview(self._map)[entry["offset"]:entry["offset"] + self.frame_bytes]
+        return Image.frombuffer("RGBA", self.size, view, "raw", "RGBA", 0, 1)
+
+    def close(self):
+        # Images returned by get() may still reference the map; let them go first
+        self.entries = {}
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+_worker_files = None
+_worker_options = None
+
+def _init_worker(directory, size, quality, display_profile):
+    global _worker_files, _worker_options
+    from renderer import get_image_files
+    _worker_files = get_image_files(directory)
+    _worker_options = (size, quality, display_profile)
+
+def _render_frame(idx):
+    from renderer import render_canvas
+    size, quality, display_profile = _worker_options
+    source = _worker_files[idx]
+    try:
+        canvas = render_canvas(source, size, quality, display_profile)
+        if canvas.mode != "RGBA":
+            canvas = canvas.convert("RGBA")
+        return idx, source_stamp(source), canvas.tobytes()
+    except Exception as e:
+        print(f"Error rendering {source}: {e}")
+        return idx, None, None
+
+def prerender(directory, size, cache_path=None, quality=None, display_profile=None, workers=None):
+    """Render every image of directory at size into a frame cache, using all cores"""
+    # Imported here because the renderer itself reads frame caches
+    from renderer import DEFAULT_QUALITY, get_image_files
+    quality = quality or DEFAULT_QUALITY
+    # Looked up first, so an unusable profile fails before any rendering
+    profile_digest = display_profile_digest(display_profile)
+    cache_path = cache_path or default_cache_path(directory)
+    image_files = get_image_files(directory)
+    if not image_files:
+        raise ValueError("No image files found.")
+    workers = workers or os.cpu_count() or 1
+    print(f"Pre-rendering {len(image_files)} images at {size[0]}x{size[1]} with {workers} workers")
+    entries = {}
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, 0))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(directory), size, quality, display_profile)) as executor:
+            # Only a couple of renders per worker are queued, so finished
+            # frames waiting to be written never pile up in memory; they are
+            # written in the order they finish, which the index makes no matter
+            pending = set()
+            next_idx = 0
+            done = 0
+            while next_idx < len(image_files) or pending:
+                while next_idx < len(image_files) and len(pending) < 2 * workers:
+                    pending.add(executor.submit(_render_frame, next_idx))
+                    next_idx += 1
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    idx, stamp, data = future.result()
+                    done += 1
+                    if data is not None:
+                        key, mtime_ns, source_size = stamp
+                        entries[key] = {"offset": f.tell(), "mtime_ns": mtime_ns, "size": source_size}
+                        f.write(data)
+                    if done % 25 == 0 or done == len(image_files):
+                        print(f"  {done}/{len(image_files)}")
+        index_offset = f.tell()
+        index = {"size": list(size), "quality": quality,
+                 "display_profile": profile_digest, "entries": entries}
+        f.write(json.dumps(index).encode("utf-8"))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, index_offset))
+    # Replace atomically so a running viewer never sees a half-written cache
+    os.replace(temp_path, cache_path)
+    print(f"Wrote {len(entries)} frames to {cache_path}")
+    return cache_path
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency harness for SlideShow
+Runs the fullscreen viewer under a virtual X server (Xvfb), drives it with
+<Right>, <Left> and <space> key events and timestamps every update of its
+image label, so the numbers include Tk and the X server, not only PIL.
+
+Reported:
+    navigation latency   key event to the first label update showing the
+                         new slide (first transition frame, or the slide
+                         itself when cutting straight to it)
+    transition error     measured transition duration minus the configured
+                         dissolve time
+    frame interval       time between consecutive transition frames, and
+                         its jitter against the per-frame budget
+
+Label updates are timestamped once Tk has redrawn the label, which is as
+close to "on screen" as an X client can observe.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark import SCREEN_SIZES, make_synthetic_corpus, parse_size, percentile
+from renderer import DEFAULT_QUALITY, QUALITY_REDUCING_GAPS, get_image_files
+from slideshow_gui import FullscreenImageViewer
+from transitions import DEFAULT_TRANSITION, TRANSITIONS
+
+@contextlib.contextmanager
+def virtual_display(screen_size):
+    """Start Xvfb with a screen of screen_size and point DISPLAY at it for the duration"""
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("Xvfb not found. Install it (e.g. apt install xvfb) or use --display.")
+    read_fd, write_fd = os.pipe()
+    # -displayfd lets Xvfb pick a free display number and report it once it is ready
+    process = subprocess.Popen(
+        ["Xvfb", "-displayfd", str(write_fd), "-screen", "0",
+         f"{screen_size[0]}x{screen_size[1]}x24", "-nolisten", "tcp"],
+        pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd) as ready:
+        number = ready.readline().strip()
+    if not number:
+        process.kill()
+        raise RuntimeError("Xvfb failed to start")
+    previous = os.environ.get("DISPLAY")
+    os.environ["DISPLAY"] = f":{number}"
+    try:
+        yield os.environ["DISPLAY"]
+    finally:
+        process.terminate()
+        process.wait()
+        if previous is None:
+            os.environ.pop("DISPLAY", None)
+        else:
+            os.environ["DISPLAY"] = previous
+
+def default_script(rounds):
+    """Keys for rounds of: forward twice, back once, pause, resume"""
+    return ["Right", "Right", "Left", "space", "space"] * rounds
+
+class InstrumentedViewer(FullscreenImageViewer):
+    """FullscreenImageViewer that plays a key script and timestamps its label updates.
+
+    FullscreenImageViewer runs the Tk main loop from its constructor, so the
+    script starts from the first displayed slide and the constructor returns
+    once the script has finished.
+    """
+
+    def __init__(self, image_files, script, key_interval_ms=1500, warmup_ms=1000, **kwargs):
+        self.script = list(script)
+        self.key_interval_ms = key_interval_ms
+        self.warmup_ms = warmup_ms
+        self.script_started = False
+        self.pending_key = None
+        self.navigation_latency = {}
+        self.transition_error_ms = []
+        self.frame_intervals_ms = []
+        self.frame_times = []
+        self.last_label_update = None
+        super().__init__(image_files, **kwargs)
+
+    def label_updated(self):
+        now = time.perf_counter()
+        if self.pending_key is not None:
+            keysym, sent = self.pending_key
+            self.navigation_latency.setdefault(keysym, []).append((now - sent) * 1000)
+            self.pending_key = None
+        self.last_label_update = now
+        return now
+
+    def display_img(self, img):
+        super().display_img(img)
+        self.label_updated()
+        if not self.script_started:
+            self.script_started = True
+            self.root.after(self.warmup_ms, self.send_next_key)
+
+    def _dissolve_images(self):
+        step = self.dissolve_step
+        if step == 0:
+            self.frame_times = []
+        super()._dissolve_images()
+        if self.dissolve_step > step:
+            self.frame_times.append(self.label_updated())
+
+    def _finish_transition(self):
+        start = self.transition_start
+        target_ms = self.dissolve_time_ms
+        super()._finish_transition()
+        # The transition ends when its final, full-resolution frame is up
+        end = self.last_label_update
+        self.transition_error_ms.append((end - start) * 1000 - target_ms)
+        times = self.frame_times + [end]
+        self.frame_intervals_ms.extend((b - a) * 1000 for a, b in zip(times, times[1:]))
+        self.frame_times = []
+
+    def send_next_key(self):
+        if not self.script:
+            # Let the last transition finish before closing
+            self.root.after(self.dissolve_time_ms + self.key_interval_ms, self.finish_script)
+            return
+        keysym = self.script.pop(0)
+        # Pausing changes nothing on screen, so only resuming is timed
+        timed = not (keysym == "space" and not self.paused)
+        self.pending_key = (keysym, time.perf_counter()) if timed else None
+        target = self.root.focus_get() or self.root
+        target.event_generate(f"<{keysym}>", when="tail")
+        self.root.after(self.key_interval_ms, self.send_next_key)
+
+    def finish_script(self):
+        if self.timer_id:
+            self.root.after_cancel(self.timer_id)
+        if self.dissolve_id:
+            self.root.after_cancel(self.dissolve_id)
+        self.stop_prefetch()
+        self.root.destroy()
+
+def print_distribution(name, values):
+    if not values:
+        print(f"{name:<26} {0:>5} {'-':>9} {'-':>9} {'-':>9} {'-':>9}")
+        return
+    print(f"{name:<26} {len(values):>5} {percentile(values, 0.50):>9.1f} {percentile(values, 0.95):>9.1f} "
+          f"{percentile(values, 0.99):>9.1f} {max(values):>9.1f}")
+
+def print_report(viewer, args):
+    screen_size = viewer.screen_size
+    budget = viewer.dissolve_time_ms / viewer.dissolve_frames
+    print(f"\nEnd-to-end latency at {screen_size[0]}x{screen_size[1]}, {args.transition} "
+          f"({viewer.dissolve_time_ms} ms, {viewer.dissolve_frames} frames, budget {budget:.1f} ms/frame), "
+          f"quality {args.quality}")
+    print(f"{'measure':<26} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    all_keys = []
+    for keysym in ("Right", "Left", "space"):
+        values = viewer.navigation_latency.get(keysym, [])
+        all_keys.extend(values)
+        label = "resume (<space>)" if keysym == "space" else f"<{keysym}>"
+        print_distribution(f"latency {label}", values)
+    print_distribution("latency, all keys", all_keys)
+    print_distribution("transition |error|", [abs(e) for e in viewer.transition_error_ms])
+    print_distribution("frame interval", viewer.frame_intervals_ms)
+    print_distribution("frame interval |jitter|", [abs(i - budget) for i in viewer.frame_intervals_ms])
+    if viewer.transition_error_ms:
+        print(f"\nTransitions: {len(viewer.transition_error_ms)}, "
+              f"mean error {statistics.mean(viewer.transition_error_ms):+.1f} ms")
+    if len(viewer.frame_intervals_ms) > 1:
+        print(f"Frame interval: mean {statistics.mean(viewer.frame_intervals_ms):.1f} ms, "
+              f"stdev {statistics.stdev(viewer.frame_intervals_ms):.1f} ms")
+    # Pauses are not timed; any other key without an update was ignored or overtaken by the next one
+    measured = sum(len(values) for values in viewer.navigation_latency.values())
+    missed = len(default_script(args.rounds)) - args.rounds - measured
+    if missed:
+        print(f"{missed} keys produced no measurable update")
+
+def run_viewer(image_files, args):
+    """Play the key script in an InstrumentedViewer and return it once done"""
+    return InstrumentedViewer(
+        image_files, default_script(args.rounds),
+        key_interval_ms=args.key_interval, warmup_ms=args.warmup,
+        # Long enough that the slide timer never fires between scripted keys
+        display_time_ms=max(60000, args.key_interval * 10),
+        dissolve_time_ms=int(args.dissolve_time * 1000), dissolve_frames=args.frames,
+        quality=args.quality, transition=args.transition, dissolve_scale=args.dissolve_scale,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SlideShow keypress latency and frame pacing under Xvfb")
+    parser.add_argument("directory", nargs="?", help="Image directory to show (default: synthetic images)")
+    parser.add_argument("--size", type=parse_size, default=SCREEN_SIZES["1080p"],
+                        help="Virtual screen size, e.g. 1920x1080, 1080p or 4k (default: 1080p)")
+    parser.add_argument("--synthetic", type=int, default=8, help="Number of synthetic images when no directory is given")
+    parser.add_argument("--image-size", type=parse_size, default=(4000, 3000),
+                        help="Size of the synthetic images (default: 4000x3000)")
+    parser.add_argument("--rounds", type=int, default=10,
+                        help="Rounds of Right, Right, Left, pause, resume to play (default: 10)")
+    parser.add_argument("--key-interval", type=int, default=1500, metavar="MS",
+                        help="Time between keys; below 400 ms the viewer treats keys as scrubbing (default: 1500)")
+    parser.add_argument("--warmup", type=int, default=1000, metavar="MS",
+                        help="Time between the first slide and the first key (default: 1000)")
+    parser.add_argument("--dissolve-time", type=float, default=1.0, metavar="SECONDS",
+                        help="Transition duration (default: 1)")
+    parser.add_argument("--frames", type=int, default=30, help="Transition frames (default: 30)")
+    parser.add_argument("--transition", choices=list(TRANSITIONS), default=DEFAULT_TRANSITION)
+    parser.add_argument("--quality", choices=list(QUALITY_REDUCING_GAPS), default=DEFAULT_QUALITY)
+    parser.add_argument("--dissolve-scale", choices=["auto", "1", "2", "3", "4"], default="auto")
+    parser.add_argument("--display", action="store_true",
+                        help="Use the current $DISPLAY instead of starting Xvfb")
+    parser.add_argument("--verbose", action="store_true", help="Show the viewer's log output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.directory:
+            image_files = get_image_files(args.directory)
+        else:
+            print(f"Generating {args.synthetic} synthetic images...")
+            image_files = make_synthetic_corpus(tmp, args.synthetic, args.image_size)
+        if len(image_files) < 2:
+            print("At least two images are needed.")
+            sys.exit(1)
+        display = contextlib.nullcontext() if args.display else virtual_display(args.size)
+        with display, open(os.devnull, "w") as devnull:
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+            with output:
+                viewer = run_viewer(image_files, args)
+        print_report(viewer, args)
+
+if __name__ == "__main__":
+    main()
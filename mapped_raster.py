@@ -0,0 +1,123 @@
+"""
+Memory-mapped raster sources for SlideShow
+Reads uncompressed TIFF, BMP and PPM/PGM images straight out of a memory map
+of the file instead of through the decoder's buffered reads.
+
+Pillow describes where an opened image's pixels are (its "tiles") before
+decoding anything. When that is a single run of raw rows, the rows are
+wrapped with Image.frombuffer over the map: 8-bit grayscale and 32-bit
+RGBA/RGBX rows are used in place with no copy at all; RGB and BGR rows are
+unpacked once, straight from the mapped pages. Either way the result goes
+to the resize step in its own mode, without the full-resolution
+convert('RGBA') copy.
+
+Given a target height, rows are also skipped with a larger stride (a
+strided view of the file), so only the pages holding the used rows are
+read at all - the uncompressed counterpart of a JPEG draft decode.
+"""
+
+import mmap
+
+from PIL import Image
+
+# Raw row layouts that can be mapped: rawmode -> (bytes per pixel, image mode)
+RAW_LAYOUTS = {
+    "L": (1, "L"),
+    "RGB": (3, "RGB"),
+    "BGR": (3, "RGB"),
+    "RGBA": (4, "RGBA"),
+    "RGBX": (4, "RGB"),
+    "BGRA": (4, "RGBA"),
+    "BGRX": (4, "RGB"),
+}
+
+# Formats that can hold a plain raw raster
+MAPPABLE_EXTENSIONS = ('.tif', '.tiff', '.bmp', '.ppm', '.pgm')
+
+# Row skipping stops while at least this many times the target height remains
+ROW_STEP_GAP = 2
+
+def raw_layout(img):
+    """Return (offset, rawmode, stride, orientation) if img's pixels are stored
+    uncompressed as one contiguous run of rows, else None.
+
+    img must be opened but not yet loaded.
+    """
+    tiles = img.tile
+    if not tiles or any(tile[0] != "raw" for tile in tiles):
+        return None
+    width, height = img.size
+    first = tiles[0]
+    args = first[3]
+    if isinstance(args, str):
+        args = (args,)
+    rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+    if rawmode not in RAW_LAYOUTS or orientation not in (1, -1):
+        return None
+    stride = stride or width * RAW_LAYOUTS[rawmode][0]
+    offset = first[2]
+    # Multi-strip TIFFs qualify when their strips follow each other directly
+    for tile in tiles:
+        left, top, right, _ = tile[1]
+        tile_args = tile[3] if isinstance(tile[3], tuple) else (tile[3],)
+        if (left, right) != (0, width) or tile_args[0] != rawmode or tile[2] != offset + top * stride:
+            return None
+    if tiles[0][1][1] != 0 or tiles[-1][1][3] != height:
+        return None
+    return offset, rawmode, stride, orientation
+
+def is_mappable(path):
+    """Return True if path is an image file open_mapped() can read from a memory map.
+
+    Only the header is parsed. Such files gain nothing from being read into
+    memory up front: they would be decoded from the copy instead of mapped.
+    """
+    if not str(path).lower().endswith(MAPPABLE_EXTENSIONS):
+        return False
+    try:
+        with Image.open(path) as img:
+            return raw_layout(img) is not None
+    except Exception:
+        return False
+
+def row_step_for(img, target_height):
+    """Rows to advance per decoded row so that at least ROW_STEP_GAP * target_height remain"""
+    if not target_height:
+        return 1
+    try:
+        # With an EXIF rotation the stored rows are not the displayed rows
+        if img.getexif().get(0x0112, 1) != 1:
+            return 1
+    except Exception:
+        return 1
+    return max(1, img.height // (target_height * ROW_STEP_GAP))
+
+def open_mapped(img, path, target_height=None):
+    """Return the pixels of the opened image img, read from a memory map of path, or None.
+
+    None means the layout is not a plain raw raster and img should be
+    decoded normally. With target_height, rows are skipped down to about
+    ROW_STEP_GAP times that height, so the returned image may be shorter
+    than img; callers fit it using img.size.
+    """
+    layout = raw_layout(img)
+    if layout is None:
+        return None
+    offset, rawmode, stride, orientation = layout
+    width, height = img.size
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if offset + stride * height > len(mapped):
+        mapped.close()
+        return None
+    step = row_step_for(img, target_height)
+    rows = (height - 1) // step + 1
+    # A shared buffer must hold whole strides; drop the last row if the file ends first
+    rows = max(1, min(rows, (len(mapped) - offset) // (stride * step)))
+    view = memoryview(mapped)[offset:offset + stride * step * rows]
+    mode = RAW_LAYOUTS[rawmode][1]
+    # frombuffer shares the mapped pages when the row layout is Pillow's own
+    return Image.frombuffer(mode, (width, rows), view, "raw", rawmode, stride * step, orientation)
@@ -0,0 +1,250 @@
+"""
+Operational metrics for SlideShow
+Health data for unattended players, written where an external agent
+(Prometheus, node_exporter's textfile collector, a fleet script) can pick
+it up.
+
+The renderer and the viewer count as they go - a few additions under a
+lock per slide, nothing per transition frame:
+    slides shown
+    transitions, and those that ran over the dissolve time by more than a frame
+    slide prepare time (count, total, max) - loading, decoding and resizing
+    cache hits and misses - slides served from the frame cache, the
+        launcher's canvas cache or the recently shown slides, against
+        slides that had to be decoded
+    decode failures
+Resident memory is read only when a snapshot is taken.
+
+MetricsExporter publishes snapshots:
+    --metrics PATH          every interval, written to PATH atomically (a
+                            temporary file renamed over it): JSON if PATH
+                            ends in .json, Prometheus text format otherwise
+    --metrics-listen ADDR   HOST:PORT or a socket path; every connection is
+                            answered with the current snapshot in Prometheus
+                            text format, as an HTTP response, so Prometheus
+                            and curl can scrape it directly
+"""
+
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+
+from playback_sync import parse_address
+
+# Seconds between snapshots written to the metrics file
+DEFAULT_INTERVAL = 15.0
+
+# Snapshot key -> (Prometheus name, type, help)
+PROMETHEUS_METRICS = {
+    "uptime_seconds": ("slideshow_uptime_seconds", "gauge", "Seconds the player has been running"),
+    "slides_shown": ("slideshow_slides_shown_total", "counter", "Slides put on screen"),
+    "transitions": ("slideshow_transitions_total", "counter", "Transitions played"),
+    "transition_overruns": ("slideshow_transition_overruns_total", "counter",
+                            "Transitions that took longer than the dissolve time plus one frame"),
+    "prepares": ("slideshow_prepares_total", "counter", "Slides prepared (loaded, decoded and resized)"),
+    "prepare_seconds_total": ("slideshow_prepare_seconds_total", "counter", "Time spent preparing slides"),
+    "prepare_seconds_average": ("slideshow_prepare_seconds_average", "gauge", "Average time to prepare a slide"),
+    "prepare_seconds_max": ("slideshow_prepare_seconds_max", "gauge", "Longest time taken to prepare a slide"),
+    "cache_hits": ("slideshow_cache_hits_total", "counter", "Slides served from the frame cache, canvas cache or recent slides"),
+    "cache_misses": ("slideshow_cache_misses_total", "counter", "Slides that had to be decoded"),
+    "cache_hit_ratio": ("slideshow_cache_hit_ratio", "gauge", "cache_hits / (cache_hits + cache_misses)"),
+    "decode_failures": ("slideshow_decode_failures_total", "counter",
+                        "Images that could not be loaded and were shown as black"),
+    "resident_bytes": ("slideshow_resident_bytes", "gauge", "Resident memory of the process"),
+}
+
+def resident_bytes():
+    """Current resident memory of this process, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        # macOS and other systems without /proc
+        output = subprocess.run(["ps", "-o", "rss=", "-p", str(os.getpid())],
+                                capture_output=True, text=True, timeout=5).stdout
+        return int(output.strip()) * 1024
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+class Metrics:
+    """Counters for one process, across every show it plays. Safe to update from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.slides_shown = 0
+        self.transitions = 0
+        self.transition_overruns = 0
+        self.prepares = 0
+        self.prepare_seconds = 0.0
+        self.prepare_seconds_max = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.decode_failures = 0
+
+    def slide_shown(self):
+        with self.lock:
+            self.slides_shown += 1
+
+    def transition_finished(self, elapsed_ms, duration_ms, frame_ms):
+        """Count a transition that took elapsed_ms against duration_ms, with frames frame_ms apart"""
+        with self.lock:
+            self.transitions += 1
+            # The last frame lands on the next timer tick, so up to one frame late is on time
+            if elapsed_ms > duration_ms + frame_ms:
+                self.transition_overruns += 1
+
+    def slide_prepared(self, seconds, cached):
+        """Count a slide prepared in seconds; cached if it came from the frame cache or canvas cache"""
+        with self.lock:
+            self.prepares += 1
+            self.prepare_seconds += seconds
+            self.prepare_seconds_max = max(self.prepare_seconds_max, seconds)
+            if cached:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def cache_hit(self):
+        """Count a slide shown again from the recent slides, without preparing it"""
+        with self.lock:
+            self.cache_hits += 1
+
+    def decode_failed(self):
+        with self.lock:
+            self.decode_failures += 1
+
+    def snapshot(self):
+        """Return the current values as a dict keyed like PROMETHEUS_METRICS"""
+        with self.lock:
+            lookups = self.cache_hits + self.cache_misses
+            snapshot = {
+                "uptime_seconds": round(time.perf_counter() - self.started, 3),
+                "slides_shown": self.slides_shown,
+                "transitions": self.transitions,
+                "transition_overruns": self.transition_overruns,
+                "prepares": self.prepares,
+                "prepare_seconds_total": round(self.prepare_seconds, 6),
+                "prepare_seconds_average": round(self.prepare_seconds / self.prepares, 6) if self.prepares else 0.0,
+                "prepare_seconds_max": round(self.prepare_seconds_max, 6),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_ratio": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                "decode_failures": self.decode_failures,
+            }
+        snapshot["resident_bytes"] = resident_bytes()
+        return snapshot
+
+def format_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines = []
+    for key, (name, kind, help_text) in PROMETHEUS_METRICS.items():
+        value = snapshot.get(key)
+        if value is None:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def format_json(snapshot):
+    return json.dumps(dict(snapshot, time=time.strftime("%Y-%m-%dT%H:%M:%S%z")), indent=1) + "\n"
+
+class MetricsExporter:
+    """Publishes snapshots of metrics to a file every interval seconds and/or on a socket.
+
+    open() claims the socket and start() begins publishing; close() writes
+    a last snapshot.
+    """
+
+    def __init__(self, metrics, path=None, listen=None, interval=DEFAULT_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.format = format_json if path and path.lower().endswith(".json") else format_prometheus
+        self.listen = listen
+        self.interval = interval
+        self.stopped = threading.Event()
+        # The writer thread and close() share one temporary file
+        self.write_lock = threading.Lock()
+        self.server = None
+        self.bound_path = None
+
+    def open(self):
+        """Listen on the socket, if any. Raises OSError or ValueError if it cannot be used."""
+        if not self.listen:
+            return
+        family, address = parse_address(self.listen)
+        if family == socket.AF_INET:
+            self.server = socket.create_server(address)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(address)
+            self.server.listen()
+            self.bound_path = address
+
+    def start(self):
+        if self.path:
+            threading.Thread(target=self._write_periodically, daemon=True).start()
+            print(f"Metrics: writing to {self.path} every {self.interval:g}s")
+        if self.server is not None:
+            threading.Thread(target=self._serve, daemon=True).start()
+            print(f"Metrics: serving on {self.server.getsockname()}")
+
+    def write(self):
+        """Write a snapshot to the metrics file"""
+        with self.write_lock:
+            data = self.format(self.metrics.snapshot())
+            # Renamed over the old file, so a scraper never reads half a snapshot
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(temporary, "w") as f:
+                    f.write(data)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                print(f"Could not write metrics file {self.path}: {e}")
+
+    def _write_periodically(self):
+        self.write()
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def _serve(self):
+        while not self.stopped.is_set():
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            with connection:
+                try:
+                    # Whatever the client asks for (an HTTP GET, or nothing at all) gets the metrics
+                    connection.settimeout(1.0)
+                    try:
+                        connection.recv(4096)
+                    except socket.timeout:
+                        pass
+                    body = format_prometheus(self.metrics.snapshot()).encode()
+                    connection.sendall(b"HTTP/1.0 200 OK\r\n"
+                                       b"Content-Type: text/plain; version=0.0.4\r\n"
+                                       b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                except OSError as e:
+                    print(f"Metrics: client failed: {e}")
+
+    def close(self):
+        self.stopped.set()
+        if self.path:
+            self.write()
+        if self.server is not None:
+            self.server.close()
+        if self.bound_path:
+            try:
+                os.unlink(self.bound_path)
+            except OSError:
+                pass
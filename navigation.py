@@ -0,0 +1,204 @@
+"""
+Keyboard navigation for SlideShow's fullscreen viewers
+Shared by the command line viewer and the launcher's viewer, so both move
+through a show the same way:
+    Right / Left        one slide on or back
+    Home / End          first / last slide
+    Page Up / Down      a tenth of the show back or on
+    digits + Return     go to that slide number
+    digits + %          go to that percentage of the show
+
+Repeated keys only move the target; rendering starts once the keys
+settle, and only for the slide the user ends up on, on a worker of its own
+so queued prefetch work never delays it. Keys closer together than
+SCRUB_INTERVAL_MS count as scrubbing, and the slide is then cut to
+instead of dissolved.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Keys handled by Navigation.handle_key, besides the digits
+JUMP_KEYS = ("Home", "End", "Prior", "Next", "Return", "KP_Enter", "percent")
+DIGITS = "0123456789"
+
+class Navigation:
+    """Coalesced keyboard navigation for a viewer.
+
+    The viewer provides root, image_files, order, position, img_idx and
+    renderer, show_image(idx, dissolve) and interrupt(), which stops the
+    slide timer and jumps any running transition to its end. loop is False
+    when the show stops at its ends.
+    """
+
+    # Navigation keys are coalesced until none has arrived for this long
+    SETTLE_MS = 120
+    # Keys closer together than this count as scrubbing, which skips the dissolve
+    SCRUB_INTERVAL_MS = 400
+    # A typed number is forgotten after this long without Return
+    TYPED_NUMBER_MS = 3000
+
+    def __init__(self, viewer, loop=True):
+        self.viewer = viewer
+        self.loop = loop
+        self.landing_executor = ThreadPoolExecutor(max_workers=1)
+        self.landing = None
+        self.settle_id = None
+        self.generation = 0
+        self.target_position = None
+        self.last_key_time = 0
+        self.scrubbing = False
+        self.typed_number = ""
+        self.typed_number_id = None
+
+    def bind(self, root):
+        """Bind the jump keys and digits on root; Right and Left stay with the viewer"""
+        for keysym in JUMP_KEYS:
+            root.bind(f"<{keysym}>", lambda e, k=keysym: self.handle_key(k))
+        for digit in DIGITS:
+            root.bind(digit, lambda e, k=digit: self.handle_key(k))
+
+    def handle_key(self, keysym):
+        """Act on a jump key or digit; returns False for any other key"""
+        count = len(self.viewer.image_files)
+        page = max(1, count // 10)
+        if keysym == "Home":
+            self.jump_to_slide(1)
+        elif keysym == "End":
+            self.jump_to_slide(count)
+        elif keysym in ("Prior", "Next"):
+            self.navigate(-page if keysym == "Prior" else page)
+        elif keysym in ("Return", "KP_Enter", "percent"):
+            self.number_entered(keysym == "percent")
+        elif len(keysym) == 1 and keysym in DIGITS:
+            self.digit_typed(keysym)
+        else:
+            return False
+        return True
+
+    def base_position(self):
+        """The play position keys move from: the pending target, else the current slide"""
+        if self.target_position is not None:
+            return self.target_position
+        return self.viewer.position
+
+    def navigate(self, delta=0, position=None):
+        """Move delta slides, or to an absolute play position, in response to a key"""
+        viewer = self.viewer
+        count = len(viewer.image_files)
+        base = self.base_position()
+        target = position if position is not None else base + delta
+        if not self.loop:
+            target = max(0, min(count - 1, target))
+        if target == base:
+            return
+        # Images that failed to load before are stepped over
+        target = viewer.renderer.playable_position(viewer.order, target, 1 if target > base else -1)
+        if not self.loop and not 0 <= target < count:
+            return
+        self.go_to(target)
+
+    def go_to(self, target):
+        """Head for play position target, rendering it once the keys settle"""
+        viewer = self.viewer
+        now = time.perf_counter()
+        self.scrubbing = (now - self.last_key_time) * 1000 < self.SCRUB_INTERVAL_MS
+        self.last_key_time = now
+        viewer.interrupt()
+
+        self.target_position = target
+        idx = viewer.order.index_at(target)
+        # Immediate feedback while the slide itself is being prepared
+        viewer.root.title(f"{viewer.image_files[idx].name} ({idx+1}/{len(viewer.image_files)})")
+        # Prefetches that have not started yet are for slides being skipped
+        viewer.renderer.cancel_prefetch(keep=idx)
+
+        if self.settle_id:
+            viewer.root.after_cancel(self.settle_id)
+        self.settle_id = viewer.root.after(self.SETTLE_MS, self._settle)
+
+    def _settle(self):
+        renderer = self.viewer.renderer
+        self.settle_id = None
+        self.generation += 1
+        idx = self.viewer.order.index_at(self.target_position)
+        # Abandon the render for an earlier target if it has not started
+        if self.landing:
+            self.landing[2].cancel()
+
+        if idx in renderer.recent_slides:
+            future = None
+        else:
+            future = renderer.prefetched.pop(idx, None)
+            if future is None or future.cancelled():
+                future = self.landing_executor.submit(renderer.load_slide, idx)
+        self.landing = (self.generation, idx, future)
+        self._poll_landing()
+
+    def _poll_landing(self):
+        if not self.landing:
+            return
+        generation, idx, future = self.landing
+        if generation != self.generation:
+            return
+        if future is not None and not future.done():
+            self.viewer.root.after(15, self._poll_landing)
+            return
+
+        viewer = self.viewer
+        self.landing = None
+        if future is not None:
+            try:
+                viewer.renderer.remember_slide(idx, future.result())
+            except Exception as e:
+                print(f"Error preparing image {idx + 1}: {e}")
+        viewer.position = self.target_position
+        self.target_position = None
+        viewer.img_idx = idx
+        # While scrubbing, cut straight to the slide instead of dissolving
+        viewer.show_image(idx, dissolve=not self.scrubbing)
+
+    def jump_to_slide(self, number):
+        """Jump to slide number (1-based, in play order within the current loop)"""
+        count = len(self.viewer.image_files)
+        number = max(1, min(count, number))
+        cycle_start = (self.base_position() // count) * count
+        self.navigate(position=cycle_start + number - 1)
+
+    def digit_typed(self, digit):
+        """Collect a typed slide number (confirmed with Return) or percentage (with %)"""
+        root = self.viewer.root
+        self.typed_number = (self.typed_number + digit)[-7:]
+        root.title(f"Go to: {self.typed_number}")
+        if self.typed_number_id:
+            root.after_cancel(self.typed_number_id)
+        self.typed_number_id = root.after(self.TYPED_NUMBER_MS, self._clear_typed_number)
+
+    def _clear_typed_number(self):
+        if self.typed_number_id:
+            self.viewer.root.after_cancel(self.typed_number_id)
+        self.typed_number = ""
+        self.typed_number_id = None
+
+    def number_entered(self, percent=False):
+        if not self.typed_number:
+            return
+        value = int(self.typed_number)
+        self._clear_typed_number()
+        if percent:
+            count = len(self.viewer.image_files)
+            self.jump_to_slide(1 + (count - 1) * min(100, value) // 100)
+        else:
+            self.jump_to_slide(value)
+
+    def close(self):
+        if self.landing and self.landing[2] is not None:
+            self.landing[2].cancel()
+        self.landing = None
+        self.landing_executor.shutdown(wait=False)
+        if self.settle_id:
+            self.viewer.root.after_cancel(self.settle_id)
+            self.settle_id = None
+        if self.typed_number_id:
+            self.viewer.root.after_cancel(self.typed_number_id)
+            self.typed_number_id = None
@@ -0,0 +1,122 @@
+"""
+Playback order for SlideShow
+Maps a play position (0, 1, 2, ... continuing across loops, negative when
+stepping back before the start) to an index in the image list.
+
+Shuffle is a seeded permutation computed on demand rather than a shuffled
+list: a small Feistel network over the next power of four above the image
+count, with cycle-walking to stay inside it. Each loop ("cycle") uses its
+own permutation, every image appears exactly once per cycle, and both
+directions are O(1) memory and cheap to compute, so the slides before and
+after any position are always known.
+"""
+
+import random
+
+_MASK64 = (1 << 64) - 1
+
+def _mix(value):
+    """splitmix64 finalizer, used as the Feistel round function"""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & _MASK64
+    return value ^ (value >> 31)
+
+class IndexPermutation:
+    """Seeded bijection on range(count)"""
+
+    rounds = 4
+
+    def __init__(self, count, seed):
+        self.count = count
+        bits = max(2, (count - 1).bit_length())
+        self.half = (bits + 1) // 2
+        self.mask = (1 << self.half) - 1
+        rng = random.Random(seed)
+        self.keys = [rng.getrandbits(64) for _ in range(self.rounds)]
+
+    def _encrypt(self, value):
+        left, right = value >> self.half, value & self.mask
+        for key in self.keys:
+            left, right = right, left ^ (_mix(right ^ key) & self.mask)
+        return (left << self.half) | right
+
+    def _decrypt(self, value):
+        left, right = value >> self.half, value & self.mask
+        for key in reversed(self.keys):
+            left, right = right ^ (_mix(left ^ key) & self.mask), left
+        return (left << self.half) | right
+
+    def forward(self, value):
+        """Return the image index played at offset value within a cycle"""
+        value = self._encrypt(value)
+        # The Feistel domain is up to 4x larger than count; walk until back inside
+        while value >= self.count:
+            value = self._encrypt(value)
+        return value
+
+    def inverse(self, index):
+        """Return the offset within a cycle at which index is played"""
+        value = self._decrypt(index)
+        while value >= self.count:
+            value = self._decrypt(value)
+        return value
+
+class SequentialOrder:
+    """Plays the images in list order"""
+
+    shuffle = False
+
+    def __init__(self, count):
+        self.count = count
+
+    def index_at(self, position):
+        return position % self.count
+
+    def position_of(self, index, cycle=0):
+        return cycle * self.count + index
+
+    def upcoming(self, position, n, playable=None, end=None):
+        """Image indices of the n positions after position.
+
+        Indices playable(index) rejects are stepped over, and the walk stops
+        before play position end (for shows that do not loop).
+        """
+        indices = []
+        # Past one full cycle of rejected indices, nothing further would be accepted either
+        for position in range(position + 1, position + 1 + n + self.count):
+            if len(indices) == n or (end is not None and position >= end):
+                break
+            index = self.index_at(position)
+            if playable is None or playable(index):
+                indices.append(index)
+        return indices
+
+class ShuffleOrder(SequentialOrder):
+    """Plays the images in a seeded random order, reshuffled every cycle"""
+
+    shuffle = True
+
+    def __init__(self, count, seed=None):
+        super().__init__(count)
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self._permutations = {}
+
+    def _permutation(self, cycle):
+        if cycle not in self._permutations:
+            if len(self._permutations) > 8:
+                self._permutations.clear()
+            self._permutations[cycle] = IndexPermutation(self.count, f"{self.seed}:{cycle}")
+        return self._permutations[cycle]
+
+    def index_at(self, position):
+        cycle, offset = divmod(position, self.count)
+        return self._permutation(cycle).forward(offset)
+
+    def position_of(self, index, cycle=0):
+        return cycle * self.count + self._permutation(cycle).inverse(index)
+
+def create_order(count, shuffle=False, seed=None):
+    """Return the playback order for count images"""
+    if shuffle:
+        return ShuffleOrder(count, seed)
+    return SequentialOrder(count)
@@ -0,0 +1,222 @@
+"""
+Synchronized playback for SlideShow
+Keeps several slideshow instances (e.g. one per screen of a video wall) in
+lockstep. One instance leads and owns the clock; the others follow it over
+a UDP or Unix datagram socket.
+
+Protocol (one JSON object per datagram):
+    follower -> leader   ping {t0}            clock sample, also the heartbeat
+                         ready {position}     slide at position is rendered
+                         key {keysym}         navigation key pressed on a follower
+    leader -> follower   pong {t0, t}         leader clock at the time of the ping
+                         prepare {position}   render this slide now
+                         advance {position, start}
+                                              show it, transition starting at
+                                              leader time start
+
+The leader only sends advance once every live follower has acknowledged the
+slide as ready (or a follower has kept it waiting for READY_TIMEOUT), and
+sets the start a little in the future so every instance, itself included,
+can schedule it. Followers convert the start to their own clock with the
+offset from the ping with the lowest round trip, NTP style. Transitions take
+their progress from that shared start, so frames line up across instances
+even when one of them is scheduled late.
+"""
+
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+# How far ahead of now the leader schedules a slide change
+START_DELAY = 0.15
+# Longest the leader waits for followers to acknowledge a slide
+READY_TIMEOUT = 5.0
+# Followers not heard from for this long no longer hold the show up
+FOLLOWER_TIMEOUT = 3.0
+PING_INTERVAL = 1.0
+# Clock samples kept for the offset estimate
+CLOCK_SAMPLES = 8
+
+def parse_address(value):
+    """Return (family, address) for HOST:PORT (UDP) or a socket file path (Unix)"""
+    host, separator, port = value.rpartition(":")
+    if separator and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError(f"'{value}' is not HOST:PORT, and Unix sockets are not available on this system")
+    return socket.AF_UNIX, value
+
+class SyncEndpoint:
+    """A datagram socket with a receiver thread; messages are collected in a queue for the Tk thread"""
+
+    def __init__(self, family, bind_address):
+        # Subclasses set up their state first: the receiver thread starts here
+        self.family = family
+        self.bound_path = bind_address if family == getattr(socket, "AF_UNIX", None) else None
+        if self.bound_path and os.path.exists(self.bound_path):
+            os.unlink(self.bound_path)
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        self.sock.bind(bind_address)
+        self.sock.settimeout(0.5)
+        self.messages = queue.Queue()
+        self.running = True
+        self.thread = threading.Thread(target=self._receive, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def now():
+        return time.perf_counter()
+
+    def send(self, address, message_type, **fields):
+        fields["type"] = message_type
+        try:
+            self.sock.sendto(json.dumps(fields).encode("utf-8"), address)
+        except OSError as e:
+            print(f"Sync: could not send {message_type} to {address}: {e}")
+
+    def _receive(self):
+        while self.running:
+            try:
+                data, address = self.sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            received = self.now()
+            try:
+                message = json.loads(data.decode("utf-8"))
+            except ValueError:
+                continue
+            if not isinstance(message, dict):
+                # Not one of ours; a stray datagram must not stop the receiver
+                continue
+            # Clock messages are answered here, not in the Tk loop, to keep their timing exact
+            if not self.handle_now(message, address, received):
+                self.messages.put((message, address))
+
+    def handle_now(self, message, address, received):
+        return False
+
+    def poll(self):
+        """Return the messages received since the last poll"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+        if self.bound_path:
+            try:
+                os.unlink(self.bound_path)
+            except OSError:
+                pass
+
+class SyncLeader(SyncEndpoint):
+    """The instance that owns the clock and decides when slides change"""
+
+    leader = True
+
+    def __init__(self, address):
+        family, address = parse_address(address)
+        self.lock = threading.Lock()
+        # follower address -> [last heard from, last acknowledged position]
+        self.followers = {}
+        super().__init__(family, address)
+        print(f"Sync: leading on {address}")
+
+    def handle_now(self, message, address, received):
+        key = address if isinstance(address, str) else tuple(address)
+        with self.lock:
+            if key not in self.followers:
+                print(f"Sync: follower {address} joined")
+                self.followers[key] = [received, None]
+            self.followers[key][0] = received
+            if message.get("type") == "ready":
+                self.followers[key][1] = message.get("position")
+        if message.get("type") == "ping":
+            self.send(address, "pong", t0=message.get("t0"), t=self.now())
+            return True
+        return message.get("type") == "ready"
+
+    def live_followers(self):
+        now = self.now()
+        with self.lock:
+            for address, (seen, _) in list(self.followers.items()):
+                if now - seen > FOLLOWER_TIMEOUT:
+                    print(f"Sync: follower {address} lost")
+                    del self.followers[address]
+            return dict(self.followers)
+
+    def all_ready(self, position):
+        return all(ready == position for _, ready in self.live_followers().values())
+
+    def broadcast(self, message_type, **fields):
+        for address in self.live_followers():
+            self.send(address, message_type, **fields)
+
+    def prepare(self, position):
+        self.broadcast("prepare", position=position)
+
+    def advance(self, position):
+        """Announce position to the followers and return the local time it starts at"""
+        start = self.now() + START_DELAY
+        self.broadcast("advance", position=position, start=start)
+        return start
+
+class SyncFollower(SyncEndpoint):
+    """An instance that shows what the leader tells it to, when it tells it to"""
+
+    leader = False
+
+    def __init__(self, address):
+        family, self.leader_address = parse_address(address)
+        if family == socket.AF_INET:
+            bind_address = ("", 0)
+        else:
+            bind_address = f"{address}.{os.getpid()}.{id(self):x}"
+        self.samples = []
+        self.offset = None
+        super().__init__(family, bind_address)
+        self.stop_pinging = threading.Event()
+        threading.Thread(target=self._ping, daemon=True).start()
+        print(f"Sync: following {self.leader_address}")
+
+    def _ping(self):
+        while not self.stop_pinging.is_set():
+            self.send(self.leader_address, "ping", t0=self.now())
+            self.stop_pinging.wait(PING_INTERVAL)
+
+    def handle_now(self, message, address, received):
+        if message.get("type") != "pong":
+            return False
+        t0, leader_time = message.get("t0"), message.get("t")
+        if not isinstance(t0, (int, float)) or not isinstance(leader_time, (int, float)):
+            return True
+        round_trip = received - t0
+        # Assume the reply took half the round trip; keep the tightest recent samples
+        self.samples = (self.samples + [(round_trip, leader_time - (t0 + received) / 2)])[-CLOCK_SAMPLES:]
+        if self.offset is None:
+            print(f"Sync: clock aligned with the leader (round trip {round_trip * 1000:.2f} ms)")
+        self.offset = min(self.samples)[1]
+        return True
+
+    def to_local(self, leader_time):
+        """Convert a leader timestamp to this instance's clock"""
+        return leader_time - (self.offset or 0.0)
+
+    def ready(self, position):
+        self.send(self.leader_address, "ready", position=position)
+
+    def forward_key(self, keysym):
+        self.send(self.leader_address, "key", keysym=keysym)
+
+    def close(self):
+        self.stop_pinging.set()
+        super().close()
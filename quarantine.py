@@ -0,0 +1,229 @@
+"""
+Load deadlines and quarantine for SlideShow
+Keeps truncated, corrupt or unreachable images (a stalled network mount)
+from holding the show up, and from being tried again on every loop.
+
+Watchdog runs each load on its own thread and waits for it only up to a
+deadline. A decode cannot be interrupted from Python, so a load that
+misses its deadline is abandoned rather than stopped: its thread is
+tracked until it returns, and while MAX_STALLED of them are still stuck
+(the mount is evidently gone) further loads fail at once instead of
+piling up more threads.
+
+Quarantine is a persistent negative cache: a JSON file listing every image
+that failed to load, with the mtime and size it had at the time. Viewers
+step over quarantined images during playback. An image that failed to
+decode stays quarantined until the file changes (a re-copied or repaired
+file is tried again). One that only timed out may be intact on a share that
+stalled for a while, so it is quarantined temporarily: tried again after a
+backoff that doubles with every timeout, and on every start. Loads the
+watchdog refuses are never quarantined; those files were not even opened.
+--quarantine-report lists the entries with their reasons.
+"""
+
+import json
+import os
+import threading
+import time
+
+from frame_cache import source_stamp
+
+# Seconds a single image may take to load before it is given up on
+DEFAULT_LOAD_TIMEOUT = 15.0
+# Abandoned loads still running after which new loads are refused
+MAX_STALLED = 8
+# Seconds before an image that timed out is tried again, doubling with every timeout
+TIMEOUT_BACKOFF = 60.0
+MAX_TIMEOUT_BACKOFF = 3600.0
+
+def default_quarantine_path():
+    """The quarantine file, next to the launcher's settings"""
+    return os.path.join(os.path.expanduser("~/Library/Application Support/SlideShow"), "quarantine.json")
+
+class LoadTimeout(Exception):
+    """A load missed its deadline"""
+
+class LoadRefused(LoadTimeout):
+    """A load was not started because earlier loads are still stuck"""
+
+class Watchdog:
+    """Runs loads under a per-file deadline"""
+
+    def __init__(self, timeout=DEFAULT_LOAD_TIMEOUT):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # thread -> (label, start time) for loads abandoned but still running
+        self.stalled = {}
+
+    def run(self, label, function, *args):
+        """Return function(*args), or raise LoadTimeout if it takes longer than the timeout"""
+        if not self.timeout or self.timeout <= 0:
+            return function(*args)
+        with self.lock:
+            if len(self.stalled) >= MAX_STALLED:
+                raise LoadRefused(f"{len(self.stalled)} earlier loads are still stuck; not starting another")
+        result = {}
+        done = threading.Event()
+        started = time.perf_counter()
+
+        def load():
+            try:
+                result["value"] = function(*args)
+            except BaseException as e:
+                result["error"] = e
+            finally:
+                with self.lock:
+                    done.set()
+                    abandoned = self.stalled.pop(threading.current_thread(), None)
+                if abandoned:
+                    print(f"Watchdog: abandoned load of {label} returned after "
+                          f"{time.perf_counter() - started:.1f}s")
+
+        thread = threading.Thread(target=load, daemon=True, name=f"load {label}")
+        thread.start()
+        if not done.wait(self.timeout):
+            with self.lock:
+                if not done.is_set():
+                    self.stalled[thread] = (label, started)
+                    raise LoadTimeout(f"no result after {self.timeout:g}s")
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+class Quarantine:
+    """Persistent record of images that failed to load. Safe to use from any thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # Serializes saves, which run on loading threads and share one temporary file
+        self.save_lock = threading.Lock()
+        self.entries = {}
+        self.recorded = 0
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable quarantine file {path}: {e}")
+
+    @staticmethod
+    def stamp(source):
+        """(mtime_ns, size) of source, or (None, None) if it cannot be read"""
+        try:
+            return source_stamp(source)[1:]
+        except (OSError, TypeError, AttributeError):
+            return None, None
+
+    def contains(self, source):
+        """Whether source should be skipped: it failed to decode, or timed out and is still backing off"""
+        with self.lock:
+            entry = self.entries.get(str(source))
+        if entry is None:
+            return False
+        return not entry.get("temporary") or time.time() < entry.get("retry_after", 0)
+
+    def forget(self, source):
+        """Drop the entry of source, which has loaded after all"""
+        with self.lock:
+            removed = self.entries.pop(str(source), None)
+        if removed is not None:
+            print(f"Quarantine: {source} loaded; no longer quarantined")
+            self.save()
+
+    def prune(self, sources):
+        """Drop the entries of sources that have changed since they failed, so they are tried again"""
+        changed = []
+        for source in sources:
+            with self.lock:
+                entry = self.entries.get(str(source))
+            if entry is None:
+                continue
+            if entry.get("temporary"):
+                # Timeouts are retried on every start
+                changed.append(str(source))
+                continue
+            mtime_ns, size = self.stamp(source)
+            if mtime_ns is not None and (mtime_ns, size) != (entry.get("mtime_ns"), entry.get("size")):
+                changed.append(str(source))
+        if changed:
+            with self.lock:
+                for key in changed:
+                    self.entries.pop(key, None)
+            print(f"Quarantine: {len(changed)} changed or timed out files will be tried again")
+            self.save()
+        quarantined = sum(1 for source in sources if self.contains(source))
+        if quarantined:
+            print(f"Quarantine: skipping {quarantined} images that failed before (see --quarantine-report)")
+
+    def record_failure(self, source, reason, temporary=False):
+        """Quarantine source; temporary (for timeouts) retries it after a backoff.
+
+        Takes effect at once. The file's mtime and size are filled in, and
+        the quarantine saved, on a thread of its own, since a stat of a file
+        that just timed out can block for as long as its share is stalled.
+        """
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            entry = self.entries.get(str(source), {"failures": 0, "first_failed": now})
+            entry.update(mtime_ns=None, size=None, reason=reason, last_failed=now,
+                         failures=entry["failures"] + 1, temporary=temporary)
+            entry.pop("retry_after", None)
+            if temporary:
+                backoff = min(MAX_TIMEOUT_BACKOFF, TIMEOUT_BACKOFF * 2 ** (entry["failures"] - 1))
+                entry["retry_after"] = time.time() + backoff
+            self.entries[str(source)] = entry
+            self.recorded += 1
+        if temporary:
+            print(f"Quarantine: {source}: {reason}; trying again in {backoff:.0f}s")
+        else:
+            print(f"Quarantine: {source}: {reason}")
+        threading.Thread(target=self._stamp_and_save, args=(source, entry), daemon=True).start()
+
+    def _stamp_and_save(self, source, entry):
+        mtime_ns, size = self.stamp(source)
+        with self.lock:
+            entry.update(mtime_ns=mtime_ns, size=size)
+        self.save()
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        with self.save_lock:
+            # Taken inside the save lock, so the last save to finish writes the newest entries
+            with self.lock:
+                data = json.dumps(self.entries, indent=1, sort_keys=True)
+            # Written to a temporary file and renamed, so a crash never leaves half a file
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(temporary, "w") as f:
+                    f.write(data)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                print(f"Could not save quarantine file {self.path}: {e}")
+
+    def report(self, sources=None):
+        """Return report lines for the quarantined images, limited to sources if given"""
+        with self.lock:
+            entries = dict(self.entries)
+        if sources is not None:
+            wanted = {str(source) for source in sources}
+            entries = {key: entry for key, entry in entries.items() if key in wanted}
+        if not entries:
+            return ["No quarantined images."]
+        lines = [f"{len(entries)} quarantined images ({self.path}):"]
+        for key, entry in sorted(entries.items()):
+            lines.append(f"  {key}")
+            retry = ""
+            if entry.get("temporary"):
+                retry = f", retried after {time.strftime('%H:%M:%S', time.localtime(entry.get('retry_after', 0)))}" \
+                        f" and on the next start"
+            lines.append(f"      {entry.get('reason')} - failed {entry.get('failures')}x, "
+                         f"first {entry.get('first_failed')}, last {entry.get('last_failed')}{retry}")
+        return lines
@@ -0,0 +1,251 @@
+"""
+Raw-bytes read-ahead for SlideShow
+On spinning disks and network shares the stall when the next slide is
+prepared is mostly waiting for the file's first bytes, not decoding. This
+stage reads the files the show will need next into memory, one after
+another on its own thread, well ahead of the decode workers, which then
+decode from memory.
+
+The cache is bounded in bytes rather than files, since a RAW-sized TIFF
+and a phone JPEG differ a hundredfold. Files larger than MAX_FILE_SHARE of
+the budget are not buffered; the kernel is asked to read them ahead instead
+(posix_fadvise WILLNEED, where available), and they are decoded from the
+file as before. So are uncompressed rasters of any size (see
+mapped_raster.py): decoding them from a copy in memory would be slower
+than mapping the file, and would hold the pixels twice.
+
+Counters: hits (decoded from memory), misses (nothing read ahead), stalls
+(the decoder had to wait for bytes, reading on demand or for a read in
+flight) and the time spent in them, and bytes read and read throughput.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from archive_source import ArchiveMember
+from mapped_raster import is_mappable
+
+DEFAULT_BUDGET_MB = 256
+DEFAULT_FILES = 8
+# Largest part of the budget a single file may take
+MAX_FILE_SHARE = 0.5
+
+def source_size(source):
+    if isinstance(source, ArchiveMember):
+        return source.size
+    return os.path.getsize(source)
+
+def read_source(source):
+    """Return the whole contents of a path or archive member"""
+    if isinstance(source, ArchiveMember):
+        with source.open() as f:
+            return f.read()
+    with open(source, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return f.read()
+
+def buffered(source, size, max_file):
+    """Whether source (of size bytes) should be read into memory rather than only hinted"""
+    if size > max_file:
+        return False
+    return isinstance(source, ArchiveMember) or not is_mappable(source)
+
+def hint_source(source):
+    """Ask the kernel to start reading source into its page cache; returns whether it could"""
+    if isinstance(source, ArchiveMember) or not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(source, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        return True
+    finally:
+        os.close(fd)
+
+class ReadAhead:
+    """Keeps the contents of the next files of the show in a byte-bounded cache.
+
+    The viewer lists the upcoming sources with want(); decoders call
+    take() for the bytes of the source they are about to decode.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1048576, files=DEFAULT_FILES):
+        self.budget = budget_bytes
+        self.files = files
+        self.max_file = int(budget_bytes * MAX_FILE_SHARE)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        # str(source) -> bytes, oldest first
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.wanted = []
+        self.hinted = set()
+        self.reading = None
+        # Bumped whenever the reader may have something new to do
+        self.generation = 0
+        self.running = True
+        self.hits = 0
+        self.misses = 0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def want(self, sources):
+        """Read the first files of sources, in order, dropping anything read for sources no longer listed"""
+        with self.lock:
+            self.wanted = list(sources)[:self.files]
+            keys = {str(source) for source in self.wanted}
+            for key in [key for key in self.cache if key not in keys]:
+                self.cached_bytes -= len(self.cache.pop(key))
+            self.hinted &= keys
+            self._notify()
+
+    def _notify(self):
+        # Called with the lock held
+        self.generation += 1
+        self.changed.notify_all()
+
+    def _next_source(self, wanted, done, used):
+        """Return (source, hint_only, unreadable keys) for the next of wanted to read.
+
+        Stats files, so it runs without the lock: want() is called on the Tk
+        thread and must not wait for a stat of a stalled share.
+        """
+        unreadable = []
+        for source in wanted:
+            key = str(source)
+            if key in done:
+                continue
+            try:
+                size = source_size(source)
+            except OSError:
+                unreadable.append(key)
+                continue
+            if not buffered(source, size, self.max_file):
+                return source, True, unreadable
+            if used + size > self.budget:
+                # Nearer files come first; wait for the decoder to take some
+                return None, False, unreadable
+            return source, False, unreadable
+        return None, False, unreadable
+
+    def _run(self):
+        seen = None
+        while True:
+            with self.lock:
+                while self.running and self.generation == seen:
+                    self.changed.wait()
+                if not self.running:
+                    return
+                seen = self.generation
+                wanted = list(self.wanted)
+                done = set(self.cache) | self.hinted
+                used = self.cached_bytes
+            source, hint_only, unreadable = self._next_source(wanted, done, used)
+            with self.lock:
+                self.hinted.update(unreadable)
+                if source is None:
+                    continue
+                key = str(source)
+                if key not in {str(wanted) for wanted in self.wanted}:
+                    # Taken or no longer wanted while it was looked at
+                    seen = None
+                    continue
+                if hint_only:
+                    self.hinted.add(key)
+                    seen = None
+                else:
+                    self.reading = key
+            if hint_only:
+                hint_source(source)
+                continue
+            started = time.perf_counter()
+            try:
+                data = read_source(source)
+            except OSError as e:
+                print(f"Read-ahead of {source} failed: {e}")
+                data = None
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.reading = None
+                if data is not None:
+                    self.bytes_read += len(data)
+                    self.read_seconds += elapsed
+                    if key in {str(wanted) for wanted in self.wanted}:
+                        self.cache[key] = data
+                        self.cached_bytes += len(data)
+                else:
+                    self.hinted.add(key)
+                self._notify()
+
+    def take(self, source):
+        """Return the contents of source for decoding, or None to decode it from the file.
+
+        Waits for a read already in flight and reads on demand when nothing
+        was read ahead; both count as stalls. Files too large to buffer,
+        and files that are memory mapped instead, return None.
+        """
+        key = str(source)
+        started = time.perf_counter()
+        with self.lock:
+            waited = False
+            while self.reading == key:
+                waited = True
+                self.changed.wait()
+            # Taken once; the reader should not fetch it again
+            self.wanted = [wanted for wanted in self.wanted if str(wanted) != key]
+            data = self.cache.pop(key, None)
+            if data is not None:
+                self.cached_bytes -= len(data)
+                self._notify()
+                self.hits += 1
+                if waited:
+                    self.stalls += 1
+                    self.stall_seconds += time.perf_counter() - started
+                return data
+            self.misses += 1
+            if key in self.hinted:
+                return None
+        try:
+            if not buffered(source, source_size(source), self.max_file):
+                return None
+            data = read_source(source)
+        except OSError:
+            # Let the decoder report it
+            return None
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.stalls += 1
+            self.stall_seconds += elapsed
+            self.bytes_read += len(data)
+            self.read_seconds += elapsed
+        return data
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stalls": self.stalls,
+                "stall_seconds": self.stall_seconds,
+                "bytes_read": self.bytes_read,
+                "read_mb_per_second": self.bytes_read / 1048576 / self.read_seconds if self.read_seconds else 0.0,
+                "cached_bytes": self.cached_bytes,
+            }
+
+    def close(self):
+        with self.lock:
+            self.running = False
+            self._notify()
+        stats = self.stats()
+        if stats["hits"] or stats["misses"]:
+            print(f"Read-ahead: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['stalls']} stalls ({stats['stall_seconds']:.2f}s), "
+                  f"{stats['bytes_read'] / 1048576:.0f} MB read at {stats['read_mb_per_second']:.0f} MB/s")
@@ -0,0 +1,676 @@
+"""
+Rendering core for SlideShow
+Everything between an image directory and the pixels to show, with no
+display code: listing sources, loading and fitting images, caching
+rendered slides and generating transition frames.
+
+Both viewers (slideshow_gui.py and slide_show.py) drive a SlideRenderer and
+only add the Tk side - timers, keys and putting frames on screen - so every
+improvement to the pipeline reaches both, and benchmark.py can measure it
+without opening a window.
+"""
+
+import io
+import locale
+import os
+import platform
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from archive_source import ArchiveMember, is_archive, list_archive_members, open_image
+from collage import CollagePage, cell_workers, render_collage
+from color_management import convert_to_display, get_icc_profile
+from frame_cache import FrameCache, source_stamp
+from mapped_raster import open_mapped
+from metrics import Metrics
+from quarantine import DEFAULT_LOAD_TIMEOUT, LoadRefused, LoadTimeout, Watchdog
+from read_ahead import DEFAULT_BUDGET_MB, DEFAULT_FILES, ReadAhead
+from transitions import DEFAULT_TRANSITION, create_transition, reduce_for_transition
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tiff', '.tif')
+
+def get_image_files(directory):
+    if is_archive(directory):
+        # Listed from the archive's index; members stand in for paths
+        files = [f for f in list_archive_members(directory) if f.suffix.lower() in IMAGE_EXTENSIONS]
+    else:
+        files = [f for f in Path(directory).iterdir() if f.suffix.lower() in IMAGE_EXTENSIONS and f.is_file()]
+
+    # Sort according to the operating system's default file sorting
+    system = platform.system()
+
+    if system == "Darwin":  # macOS
+        # Use locale-aware sorting like Finder
+        files.sort(key=lambda x: locale.strxfrm(x.name.lower()))
+    elif system == "Windows":
+        # Windows Explorer uses case-insensitive natural sorting
+        def natural_sort_key(path):
+            def convert(text):
+                return int(text) if text.isdigit() else text.lower()
+            return [convert(c) for c in re.split(r'(\d+)', path.name)]
+        files.sort(key=natural_sort_key)
+    else:  # Linux and other Unix-like systems
+        # Most Linux file managers use case-sensitive alphabetical by default
+        # but we'll use case-insensitive for better user experience
+        files.sort(key=lambda x: x.name.lower())
+
+    return files
+
+# EXIF orientation -> the transpose that shows the image upright
+EXIF_TRANSPOSES = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+def exif_orientation(image):
+    """Return the EXIF orientation of image (1 when there is none)"""
+    try:
+        return image.getexif().get(0x0112, 1)
+    except Exception:
+        return 1
+
+def apply_exif_orientation(image, orientation=None):
+    """Apply EXIF orientation to image if present.
+
+    Pass the orientation read from the original file when image is a
+    converted or resized copy, which may no longer carry the EXIF data.
+    """
+    if orientation is None:
+        orientation = exif_orientation(image)
+    method = EXIF_TRANSPOSES.get(orientation)
+    if method is None:
+        return image
+    return image.transpose(method)
+
+def to_resizable(img):
+    """Convert img to the cheapest mode that resizes correctly.
+
+    Grayscale stays 1 byte per pixel and opaque color stays RGB, which
+    resizes much faster than RGBA. Palette images are expanded only as far
+    as their palette needs (L for gray palettes). 16-bit and float data
+    are kept at full depth until after the resize (see to_8bit), and CMYK
+    is resized as CMYK so the color conversion runs at screen size.
+    """
+    mode = img.mode
+    if mode in ("L", "LA", "RGB", "RGBA", "CMYK", "I", "F"):
+        return img
+    if mode == "P":
+        if "transparency" in img.info or img.palette.mode == "RGBA":
+            return img.convert("RGBA")
+        palette = img.getpalette() or []
+        if all(palette[i] == palette[i + 1] == palette[i + 2] for i in range(0, len(palette) - 2, 3)):
+            return img.convert("L")
+        return img.convert("RGB")
+    if mode == "1":
+        return img.convert("L")
+    if mode.startswith("I;16"):
+        return img.convert("I")
+    if mode in ("PA", "RGBa", "La"):
+        return img.convert("RGBA")
+    if mode in ("YCbCr", "LAB", "HSV", "RGBX"):
+        return img.convert("RGB")
+    return img.convert("RGBA")
+
+def tone_map(img):
+    """Map 16-bit (or deeper) integer or float grayscale data to 8-bit L.
+
+    Integer data is scaled by the bit depth its brightest value needs
+    (10, 12, 14 or 16 bits...), so a 12-bit scan fills the 8-bit range
+    instead of clipping to white as a plain convert() does. Float data is
+    taken as 0..1. The scaling is a single point() pass in C.
+    """
+    low, high = img.getextrema()
+    if img.mode == "F" and high <= 1.0:
+        scale = 255.0
+    else:
+        bits = max(8, int(high).bit_length())
+        scale = 255.0 / ((1 << bits) - 1)
+    if img.mode != "F":
+        img = img.convert("F")
+    return img.point(lambda value: value * scale).convert("L")
+
+def to_8bit(img):
+    """Convert a resized image to 8-bit L, LA, RGB or RGBA for display"""
+    if img.mode in ("I", "F"):
+        return tone_map(img)
+    if img.mode == "CMYK":
+        return img.convert("RGB")
+    return img
+
+# Resampling quality tiers. "best" is a single LANCZOS pass from full
+# resolution; the faster tiers let the JPEG decoder scale down (draft) and
+# then reduce() by an integer factor to within reducing_gap of the target
+# before a cheaper final pass. A gap of 2 or more would leave a camera-sized
+# JPEG going to 1080p with neither a draft nor a reduce step.
+QUALITY_REDUCING_GAPS = {
+    "fast": 1.0,
+    "balanced": 1.5,
+    "best": None,
+}
+# Final resampling filter per tier; it keeps the tiers apart where no
+# draft scale fits between the image and the screen
+QUALITY_FILTERS = {
+    "fast": Image.BILINEAR,
+    "balanced": Image.BICUBIC,
+    "best": Image.LANCZOS,
+}
+DEFAULT_QUALITY = "balanced"
+
+def fit_size(image_size, screen_size):
+    """Return the largest size with image_size's aspect ratio that fits the screen"""
+    width, height = image_size
+    screen_width, screen_height = screen_size
+    if width / height > screen_width / screen_height:
+        return screen_width, max(1, int(screen_width * height / width))
+    return max(1, int(screen_height * width / height)), screen_height
+
+def draft_for_quality(img, screen_size, quality):
+    """Ask the decoder for a cheaper, pre-scaled decode where the tier allows it.
+
+    Must be called before the image is loaded. Only JPEG supports this;
+    other formats ignore the request.
+    """
+    gap = QUALITY_REDUCING_GAPS[quality]
+    if gap is None:
+        return
+    target = fit_size(img.size, screen_size)
+    try:
+        # EXIF rotation swaps the axes the image is fitted on
+        if img.getexif().get(0x0112) in (5, 6, 7, 8):
+            rotated = fit_size((img.height, img.width), screen_size)
+            target = (max(target[0], rotated[1]), max(target[1], rotated[0]))
+    except Exception:
+        pass
+    img.draft(None, (int(target[0] * gap), int(target[1] * gap)))
+
+def resize_with_quality(img, size, quality):
+    """Resize img to size using the given quality tier"""
+    gap = QUALITY_REDUCING_GAPS[quality]
+    resample = QUALITY_FILTERS[quality]
+    if gap is None or img.width < size[0] * gap:
+        return img.resize(size, resample)
+    return img.resize(size, resample, reducing_gap=gap)
+
+def render_fitted(img_path, screen_size, quality=DEFAULT_QUALITY, display_profile=None, data=None, quiet=False):
+    """Load img_path and return it upright and fitted to screen_size, in 8-bit L, LA, RGB or RGBA.
+
+    Embedded ICC profiles are converted to display_profile (an ICC file
+    path, or None for sRGB) after resizing. data is the file's contents
+    when they have already been read (see read_ahead.py); the image is
+    then decoded from memory. quiet leaves out the progress messages.
+    """
+    img = open_image(io.BytesIO(data) if data is not None else img_path)
+    icc_profile = get_icc_profile(img)
+    mapped = None
+    if data is None and isinstance(img_path, (str, os.PathLike)):
+        # Uncompressed TIFF/BMP/PPM: resize straight from the mapped file;
+        # the fast tier also skips rows, like a JPEG draft decode
+        row_target = fit_size(img.size, screen_size)[1] if quality == "fast" else None
+        mapped = open_mapped(img, img_path, row_target)
+    # EXIF rotation is applied after the resize, where it is cheap, so the
+    # image is fitted with its axes swapped when it will be turned sideways
+    orientation = exif_orientation(img)
+    if orientation in (5, 6, 7, 8):
+        fit_width, fit_height = fit_size((img.height, img.width), screen_size)
+        resize_to = (fit_height, fit_width)
+    else:
+        resize_to = fit_size(img.size, screen_size)
+    if mapped is not None:
+        img.close()
+        img = mapped
+        if not quiet:
+            print(f"Image mapped: {img.size}, mode: {img.mode}")
+    else:
+        draft_for_quality(img, screen_size, quality)
+        img = to_resizable(img)
+        if not quiet:
+            print(f"Image loaded successfully: {img.size}, mode: {img.mode}")
+
+    if not quiet:
+        print(f"Resizing to: {resize_to[0]}x{resize_to[1]} ({quality})")
+    img = resize_with_quality(img, resize_to, quality)
+    img = apply_exif_orientation(img, orientation)
+    # ICC conversion (including CMYK profiles) and bit depth reduction at screen size
+    img = convert_to_display(img, icc_profile, display_profile)
+    return to_8bit(img)
+
+def place_on_canvas(img, screen_size):
+    """Center a fitted image on a black screen-sized RGBA canvas"""
+    screen_width, screen_height = screen_size
+    new_width, new_height = img.size
+    canvas = Image.new('RGBA', (screen_width, screen_height), (0, 0, 0, 255))
+    offset_x = (screen_width - new_width) // 2
+    offset_y = (screen_height - new_height) // 2
+    canvas.paste(img, (offset_x, offset_y), mask=img if img.mode in ('RGBA', 'LA') else None)
+    return canvas
+
+def render_canvas(img_path, screen_size, quality=DEFAULT_QUALITY, display_profile=None, data=None):
+    """Load img_path and return it fitted and centered on a black screen-sized canvas"""
+    return place_on_canvas(render_fitted(img_path, screen_size, quality, display_profile, data), screen_size)
+
+def render_pyramid(img_path, screen_size, quality=DEFAULT_QUALITY, display_profile=None, levels=None, data=None):
+    """Decode img_path once and return {"canvas": screen canvas, name: smaller image, ...}.
+
+    levels maps names to the boxes (width, height) to fit further copies
+    into, e.g. {"thumbnail": (96, 96), "preview": (480, 360)}. Each is
+    scaled down from the next larger one rather than from the source, so
+    the extra levels cost a few milliseconds, not another decode.
+    """
+    fitted = render_fitted(img_path, screen_size, quality, display_profile, data)
+    pyramid = {"canvas": place_on_canvas(fitted, screen_size)}
+    level = fitted
+    for name, box in sorted((levels or {}).items(), key=lambda item: -item[1][0] * item[1][1]):
+        level = level.copy()
+        level.thumbnail(box, Image.LANCZOS)
+        pyramid[name] = level
+    return pyramid
+
+class PyramidCache:
+    """Thumbnails and screen canvases shared by the launcher and the viewer.
+
+    The launcher decodes the image a show will start on once, through
+    render_pyramid, and keeps both its thumbnail and its canvas here; the
+    viewer then starts from that canvas instead of decoding the file again,
+    and the thumbnails of slides the viewer renders are kept for the
+    launcher in return. A decode still running when the other side asks for
+    the same canvas is waited for rather than repeated.
+
+    Entries are keyed by the source's current version (see source_stamp),
+    so an edited file is decoded again. Thumbnails are small and many are
+    kept; canvases are screen-sized and only MAX_CANVASES are. Safe to use
+    from any thread.
+    """
+
+    THUMBNAIL_SIZE = (96, 96)
+    MAX_THUMBNAILS = 5000
+    MAX_CANVASES = 4
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thumbnails = OrderedDict()
+        self.canvases = OrderedDict()
+        # canvas key -> Event set when the decode producing it finishes
+        self.decoding = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def source_key(source):
+        try:
+            return (str(source),) + source_stamp(source)[1:]
+        except OSError:
+            return (str(source),)
+
+    @staticmethod
+    def _remember(entries, key, value, limit):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > limit:
+            entries.popitem(last=False)
+
+    def get_thumbnail(self, source):
+        with self.lock:
+            return self.thumbnails.get(self.source_key(source))
+
+    def load_thumbnail(self, source):
+        """Return the thumbnail of source, decoding just the thumbnail if it is not cached"""
+        key = self.source_key(source)
+        with self.lock:
+            if key in self.thumbnails:
+                return self.thumbnails[key]
+        # Fitted straight to the thumbnail box, so JPEGs decode at 1/8 scale
+        thumbnail = render_fitted(source, self.THUMBNAIL_SIZE)
+        with self.lock:
+            self._remember(self.thumbnails, key, thumbnail, self.MAX_THUMBNAILS)
+        return thumbnail
+
+    def load_canvas(self, source, size, quality=DEFAULT_QUALITY, display_profile=None, read=None):
+        """Return (canvas, cached) for source at size, decoding it (and its thumbnail) if it is not cached.
+
+        cached is True when the canvas was already here, or decoded by
+        another thread while this one waited. read, if given, is called on a miss only and returns the file's
+        contents to decode from, or None to decode from the file.
+        """
+        source_key = self.source_key(source)
+        key = (source_key, tuple(size), quality, display_profile)
+        while True:
+            with self.lock:
+                if key in self.canvases:
+                    self.hits += 1
+                    self.canvases.move_to_end(key)
+                    return self.canvases[key], True
+                running = self.decoding.get(key)
+                if running is None:
+                    self.misses += 1
+                    self.decoding[key] = threading.Event()
+                    break
+            # Another thread is decoding this canvas; wait for it, then look again
+            running.wait()
+        try:
+            pyramid = render_pyramid(source, size, quality, display_profile,
+                                     levels={"thumbnail": self.THUMBNAIL_SIZE}, data=read() if read else None)
+            with self.lock:
+                self._remember(self.canvases, key, pyramid["canvas"], self.MAX_CANVASES)
+                self._remember(self.thumbnails, source_key, pyramid["thumbnail"], self.MAX_THUMBNAILS)
+            return pyramid["canvas"], False
+        finally:
+            with self.lock:
+                self.decoding.pop(key).set()
+
+# Largest integer factor by which transition frames may be reduced
+MAX_DISSOLVE_SCALE = 4
+# Part of the frame budget a probe frame may take at the automatic scale; the blit needs the rest
+PROBE_BUDGET_SHARE = 0.75
+
+class SlideRenderer:
+    """Renders the slides of a show at one screen size, and the transitions between them.
+
+    Slides are (canvas, source) pairs: canvas is the screen-sized image and
+    source the oversampled rendering zooming transitions need, or None.
+    Rendering runs on the caller's thread (load_slide) or on the
+    prefetch_workers prefetch threads (prefetch, submit); everything else
+    belongs to the caller's thread.
+    """
+
+    # Recently shown slides kept rendered, so stepping back and forth is instant
+    RECENT_SLIDES = 3
+
+    def __init__(self, image_files, screen_size, quality=DEFAULT_QUALITY, transition=DEFAULT_TRANSITION,
+                 display_profile=None, frame_cache_path=None, dissolve_scale="auto", pyramid_cache=None,
+                 quarantine=None, load_timeout=DEFAULT_LOAD_TIMEOUT, read_ahead_mb=DEFAULT_BUDGET_MB,
+                 read_ahead_files=DEFAULT_FILES, metrics=None, prefetch_workers=1):
+        self.image_files = image_files
+        self.screen_size = screen_size
+        self.quality = quality
+        self.display_profile = display_profile
+        self.transition_name = transition
+        self.transition = create_transition(transition, screen_size)
+        self.scaled_transitions = {1: self.transition}
+        # Transition frames are computed at 1/dissolve_scale of the screen
+        # resolution and scaled up by the viewer; "auto" adjusts it from frame timing
+        self.dissolve_scale_auto = dissolve_scale == "auto"
+        self.dissolve_scale = 1 if self.dissolve_scale_auto else int(dissolve_scale)
+        self.active_transition = None
+        self.active_scale = 1
+        self.transition_frame_ms = []
+        # The automatic scale is checked against the budget on the first transition
+        self.scale_probed = False
+        # Pre-rendered frames (see --prerender), used when they match this screen
+        self.frame_cache = FrameCache.open(frame_cache_path, screen_size, quality, display_profile)
+        # Canvases and thumbnails shared with the launcher (see PyramidCache)
+        self.pyramid_cache = pyramid_cache
+        # Every load runs under a deadline; failures are remembered across shows
+        self.watchdog = Watchdog(load_timeout)
+        self.quarantine = quarantine
+        self.quarantined = 0
+        # Raw file contents of the upcoming slides, read ahead of decoding
+        self.read_ahead = ReadAhead(read_ahead_mb * 1048576, read_ahead_files) if read_ahead_mb > 0 else None
+        self.read_ahead_files = read_ahead_files
+        if quarantine is not None:
+            # Pruning stats every quarantined file; a stalled mount must not hold up the viewer
+            threading.Thread(target=quarantine.prune, args=(list(image_files),), daemon=True).start()
+        # Health counters for --metrics; kept whether or not anything exports them
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=prefetch_workers)
+        # Resizes the cells of collage slides in parallel; threads start only when used
+        self.cell_executor = ThreadPoolExecutor(max_workers=cell_workers())
+        self.prefetched = {}
+        self.recent_slides = OrderedDict()
+
+    def prepare_canvas(self, img_path, oversample=1.0):
+        """Resize image with aspect ratio, center it on black canvas.
+
+        With oversample > 1 the canvas is rendered that much larger than the
+        screen, for transitions that zoom. Never raises: an image that cannot
+        be loaded within the load timeout gives a black canvas, and is
+        quarantined so playback skips it - until the file changes if it
+        failed to decode, for a backoff if it timed out.
+        """
+        started = time.perf_counter()
+        try:
+            if self.quarantine is not None and self.quarantine.contains(img_path):
+                print(f"Not loading quarantined image: {img_path}")
+                return self.black_canvas()
+            # Even the frame cache stats the file, which blocks on a stalled mount
+            canvas, cached = self.watchdog.run(img_path, self.fetch_canvas, img_path, oversample)
+            if cached:
+                self.metrics.slide_prepared(time.perf_counter() - started, cached=True)
+                return canvas
+            print(f"Canvas prepared successfully: {canvas.size}, mode: {canvas.mode}")
+            self.metrics.slide_prepared(time.perf_counter() - started, cached=False)
+            if self.quarantine is not None:
+                # An image that timed out before has loaded after all
+                self.quarantine.forget(img_path)
+            return canvas
+        except Exception as e:
+            self.metrics.slide_prepared(time.perf_counter() - started, cached=False)
+            if isinstance(e, LoadRefused):
+                # Never opened, so nothing is known about the file itself
+                print(f"Not loading image {img_path}: {e}")
+                return self.black_canvas()
+            self.metrics.decode_failed()
+            if isinstance(e, LoadTimeout):
+                print(f"Gave up loading image {img_path}: {e}")
+                reason = f"timed out: {e}"
+            else:
+                print(f"Error loading image {img_path}: {e}")
+                traceback.print_exc()
+                reason = f"{type(e).__name__}: {e}"
+            # Files only: collages and streamed images have nothing to key a quarantine entry on
+            if self.quarantine is not None and isinstance(img_path, (str, os.PathLike, ArchiveMember)):
+                self.quarantine.record_failure(img_path, reason, temporary=isinstance(e, LoadTimeout))
+                self.quarantined += 1
+            return self.black_canvas()
+
+    def fetch_canvas(self, img_path, oversample):
+        """Return (canvas, cached): the pre-rendered or already cached canvas of img_path, else a new rendering"""
+        if oversample == 1.0 and self.frame_cache is not None and not isinstance(img_path, CollagePage):
+            canvas = self.frame_cache.get(img_path)
+            if canvas is not None:
+                print(f"Using pre-rendered frame: {img_path}")
+                return canvas, True
+        print(f"Loading image: {img_path}")
+        size = (int(self.screen_size[0] * oversample), int(self.screen_size[1] * oversample))
+        return self.render_at(img_path, size)
+
+    def render_at(self, img_path, size):
+        """Return (canvas, cached) for img_path at size; cached if the pyramid cache had it"""
+        if isinstance(img_path, CollagePage):
+            # Several images composited into one canvas, which is then cached and shown like any other
+            return render_collage(img_path, size, self.quality, self.display_profile, self.cell_executor), False
+        read = None
+        if self.read_ahead is not None and isinstance(img_path, (str, os.PathLike, ArchiveMember)):
+            # Read-ahead has usually fetched the file already; decode from memory
+            read = lambda: self.read_ahead.take(img_path)
+        if self.pyramid_cache is not None:
+            # Taken only if the canvas is not cached, so a cached slide never waits for its file
+            canvas, cached = self.pyramid_cache.load_canvas(img_path, size, self.quality, self.display_profile, read)
+            if cached:
+                print(f"Using cached canvas: {img_path}")
+            return canvas, cached
+        return render_canvas(img_path, size, self.quality, self.display_profile, read() if read else None), False
+
+    def black_canvas(self):
+        # Shown in place of an image that cannot be loaded
+        screen_width, screen_height = self.screen_size
+        print(f"Creating fallback black canvas: {screen_width}x{screen_height}")
+        return Image.new('RGB', (screen_width, screen_height), (0, 0, 0))
+
+    def playable(self, idx):
+        """False for images that are quarantined"""
+        return self.quarantine is None or not self.quarantine.contains(self.image_files[idx])
+
+    def playable_position(self, order, position, step=1):
+        """The first play position from position on, stepping by step, whose image is not quarantined"""
+        for _ in range(len(self.image_files)):
+            if self.playable(order.index_at(position)):
+                return position
+            position += step
+        # Everything is quarantined; play on regardless
+        return position
+
+    def load_slide(self, idx):
+        """Render image idx, returning (canvas, source). Safe to call from any thread."""
+        return self.render_slide(self.image_files[idx])
+
+    def render_slide(self, img_path):
+        """Render img_path (a path, archive member, CollagePage or file object) as (canvas, source)"""
+        if self.transition.oversample > 1:
+            # Decode once at the oversampled size and derive the screen canvas from it
+            source = self.prepare_canvas(img_path, self.transition.oversample)
+            return source.resize(self.screen_size, Image.LANCZOS), source
+        return self.prepare_canvas(img_path), None
+
+    def take_slide(self, idx):
+        """Return (canvas, source) for idx, from the recent slides or the prefetcher when possible"""
+        if idx in self.recent_slides:
+            self.recent_slides.move_to_end(idx)
+            self.metrics.cache_hit()
+            return self.recent_slides[idx]
+        slide = None
+        future = self.prefetched.pop(idx, None)
+        if future is not None and not future.cancelled():
+            try:
+                # Waits if the prefetch is still running, which beats starting over
+                slide = future.result()
+            except Exception as e:
+                print(f"Prefetch of image {idx + 1} failed: {e}")
+        if slide is None:
+            slide = self.load_slide(idx)
+        self.remember_slide(idx, slide)
+        return slide
+
+    def remember_slide(self, idx, slide):
+        self.recent_slides[idx] = slide
+        self.recent_slides.move_to_end(idx)
+        while len(self.recent_slides) > self.RECENT_SLIDES:
+            self.recent_slides.popitem(last=False)
+
+    def submit(self, idx):
+        """Render idx on a prefetch worker and return the future"""
+        return self.prefetch_executor.submit(self.load_slide, idx)
+
+    def prefetch(self, indices, current=None):
+        """Start rendering indices in the background and drop prefetches of anything else"""
+        for idx in list(self.prefetched):
+            if idx not in indices:
+                self.prefetched.pop(idx).cancel()
+        for idx in indices:
+            if idx not in self.prefetched and idx != current and idx not in self.recent_slides:
+                self.prefetched[idx] = self.submit(idx)
+
+    def read_ahead_upcoming(self, indices):
+        """Have the read-ahead fetch the files of indices (in play order) that will need decoding"""
+        if self.read_ahead is None:
+            return
+        sources = []
+        for idx in indices:
+            source = self.image_files[idx]
+            if idx in self.recent_slides or not isinstance(source, (str, os.PathLike, ArchiveMember)):
+                continue
+            if self.frame_cache is not None and source.name in self.frame_cache.entries:
+                continue
+            if self.playable(idx):
+                sources.append(source)
+        self.read_ahead.want(sources)
+
+    def cancel_prefetch(self, keep=None):
+        """Drop the prefetches that have not started yet, except the one for keep"""
+        for idx, future in list(self.prefetched.items()):
+            if idx != keep and future.cancel():
+                del self.prefetched[idx]
+
+    def close(self):
+        for future in self.prefetched.values():
+            future.cancel()
+        self.prefetched = {}
+        self.prefetch_executor.shutdown(wait=False)
+        self.cell_executor.shutdown(wait=False)
+        if self.read_ahead is not None:
+            self.read_ahead.close()
+        if self.quarantined:
+            print("\n".join(self.quarantine.report(self.image_files)))
+
+    def transition_for_scale(self, factor):
+        """Return the transition instance working at 1/factor of the screen size"""
+        if factor not in self.scaled_transitions:
+            width, height = self.screen_size
+            size = (-(-width // factor), -(-height // factor))
+            self.scaled_transitions[factor] = create_transition(self.transition_name, size)
+        return self.scaled_transitions[factor]
+
+    def start_transition(self, from_canvas, slide, budget_ms=None):
+        """Prepare the transition from from_canvas to slide at the current dissolve scale.
+
+        With the automatic scale and a per-frame budget_ms, the first
+        transition times a probe frame and reduces the resolution until it
+        fits, so an expensive effect such as kenburns does not run over for
+        a whole transition before finish_transition() adapts.
+        """
+        canvas, source = slide
+        while True:
+            factor = self.dissolve_scale
+            self.active_scale = factor
+            self.active_transition = self.transition_for_scale(factor)
+            self.active_transition.prepare(reduce_for_transition(from_canvas, factor),
+                                           reduce_for_transition(canvas, factor),
+                                           reduce_for_transition(source, factor))
+            if not self.dissolve_scale_auto or not budget_ms or self.scale_probed:
+                break
+            probe_ms = self.probe_frame_ms()
+            if probe_ms <= budget_ms * PROBE_BUDGET_SHARE or factor >= MAX_DISSOLVE_SCALE:
+                self.scale_probed = True
+                break
+            print(f"Transition {self.transition_name} frames take {probe_ms:.1f} ms against a "
+                  f"{budget_ms:.1f} ms budget; rendering them at 1/{factor + 1} resolution")
+            self.dissolve_scale = factor + 1
+        self.transition_frame_ms = []
+
+    def probe_frame_ms(self):
+        """Time of the slowest of a few frames of the active transition, in milliseconds"""
+        slowest = 0.0
+        for t in (0.25, 0.5, 0.75):
+            started = time.perf_counter()
+            self.active_transition.frame(t)
+            slowest = max(slowest, (time.perf_counter() - started) * 1000)
+        return slowest
+
+    def transition_frame(self, t):
+        """Frame of the active transition at progress t, at 1/active_scale of the screen size"""
+        return self.active_transition.frame(t)
+
+    def record_frame(self, frame_ms):
+        """Record how long the viewer took to produce and show one transition frame"""
+        self.transition_frame_ms.append(frame_ms)
+
+    def finish_transition(self, budget_ms):
+        """Log the transition's frame timing and pick the dissolve scale for the next one"""
+        if not self.transition_frame_ms:
+            return
+        average = sum(self.transition_frame_ms) / len(self.transition_frame_ms)
+        print(f"Transition {self.transition_name}: {len(self.transition_frame_ms)} frames, "
+              f"{average:.1f} ms/frame average, {max(self.transition_frame_ms):.1f} ms max"
+              f" at 1/{self.active_scale} resolution")
+        if not self.dissolve_scale_auto or len(self.transition_frame_ms) < 3 or budget_ms <= 0:
+            return
+        factor = self.dissolve_scale
+        if average > budget_ms * 0.9 and factor < MAX_DISSOLVE_SCALE:
+            factor += 1
+        elif average < budget_ms * 0.3 and factor > 1:
+            factor -= 1
+        if factor != self.dissolve_scale:
+            print(f"Transition frames took {average:.1f} ms against a {budget_ms:.1f} ms budget; "
+                  f"rendering them at 1/{factor} resolution")
+            self.dissolve_scale = factor
@@ -0,0 +1,103 @@
+"""
+Session profiling for SlideShow
+Wraps a slideshow session in cProfile and takes a tracemalloc snapshot every
+N slides, writing everything to a report directory.
+
+Report contents:
+    profile.prof        raw cProfile data (open with pstats or snakeviz)
+    profile.txt         top functions by cumulative and internal time
+    allocations.txt     top allocation sites and growth, one section per snapshot
+
+tracemalloc keeps a single frame per allocation, which is enough to name
+the allocating line and keeps the overhead low enough for a full loop.
+cProfile only sees the thread it was started on (the Tk thread); time
+spent in background decode threads shows up as waits there. Pixel buffers
+are allocated by Pillow outside the Python allocator, so tracemalloc shows
+the Python objects holding them, not their size.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+class SessionProfiler:
+    def __init__(self, report_dir, snapshot_every=25, top=20):
+        self.report_dir = os.path.join(report_dir, time.strftime("slideshow-profile-%Y%m%d-%H%M%S"))
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.slides = 0
+        self.started = None
+        self.previous_snapshot = None
+        self.running = False
+
+    def start(self):
+        os.makedirs(self.report_dir, exist_ok=True)
+        self.started = time.perf_counter()
+        tracemalloc.start(1)
+        self.profile.enable()
+        self.running = True
+        print(f"Profiling to {self.report_dir}")
+
+    def slide_shown(self):
+        """Count a displayed slide; every snapshot_every slides record allocations"""
+        if not self.running:
+            return
+        self.slides += 1
+        if self.slides % self.snapshot_every == 0:
+            self.snapshot()
+
+    def snapshot(self):
+        """Append the top allocation sites, and growth since the last snapshot, to allocations.txt"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"=== after {self.slides} slides, "
+                 f"{time.perf_counter() - self.started:.0f}s: "
+                 f"{current / 1048576:.1f} MB traced, {peak / 1048576:.1f} MB peak ==="]
+        lines.append("Top allocation sites:")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            lines.append(f"  {stat}")
+        if self.previous_snapshot is not None:
+            lines.append("Growth since previous snapshot:")
+            for stat in snapshot.compare_to(self.previous_snapshot, "lineno")[:self.top]:
+                lines.append(f"  {stat}")
+        self.previous_snapshot = snapshot
+        with open(os.path.join(self.report_dir, "allocations.txt"), "a") as f:
+            f.write("\n".join(lines) + "\n\n")
+
+    def write_report(self):
+        """Write the profile collected so far. Profiling carries on if it was running."""
+        if self.started is None:
+            return
+        if self.running:
+            self.profile.disable()
+        try:
+            self.profile.dump_stats(os.path.join(self.report_dir, "profile.prof"))
+            text = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=text)
+            text.write(f"{self.slides} slides in {time.perf_counter() - self.started:.1f}s\n\n")
+            stats.sort_stats("cumulative").print_stats(self.top * 2)
+            stats.sort_stats("tottime").print_stats(self.top * 2)
+            with open(os.path.join(self.report_dir, "profile.txt"), "w") as f:
+                f.write(text.getvalue())
+            if self.running:
+                self.snapshot()
+        finally:
+            if self.running:
+                self.profile.enable()
+        print(f"Profile report written to {self.report_dir}")
+
+    def stop(self):
+        """Stop profiling and write the final report"""
+        if not self.running:
+            return
+        self.write_report()
+        self.profile.disable()
+        tracemalloc.stop()
+        self.running = False
@@ -1,43 +1,70 @@
 import os
 import sys
-import platform
-from pathlib import Path
-from PIL import Image, ImageTk
+import argparse
+import time
+from PIL import ImageTk
 import tkinter as tk
-import locale
+from transitions import TRANSITIONS, DEFAULT_TRANSITION
+from archive_source import close_archives
+from frame_cache import default_cache_path, prerender
+from renderer import DEFAULT_QUALITY, QUALITY_REDUCING_GAPS, SlideRenderer, get_image_files
+from navigation import DIGITS, JUMP_KEYS, Navigation
+from playback_order import create_order
+from session_profiler import SessionProfiler
+from playback_sync import READY_TIMEOUT, SyncFollower, SyncLeader
+from stream_ingest import DEFAULT_QUEUE_SIZE, QUEUE_POLICIES, ImageStream
+from collage import group_pages, parse_layout
+from quarantine import DEFAULT_LOAD_TIMEOUT, Quarantine, default_quarantine_path
+from read_ahead import DEFAULT_BUDGET_MB, DEFAULT_FILES
+from metrics import DEFAULT_INTERVAL, Metrics, MetricsExporter
+from calibration import Calibration, default_calibration_path, dissolve_frames
 
-def get_image_files(directory):
-    exts = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tiff', '.tif')
-    files = [f for f in Path(directory).iterdir() if f.suffix.lower() in exts and f.is_file()]
-    
-    # Sort according to the operating system's default file sorting
-    system = platform.system()
-    
-    if system == "Darwin":  # macOS
-        # Use locale-aware sorting like Finder
-        files.sort(key=lambda x: locale.strxfrm(x.name.lower()))
-    elif system == "Windows":
-        # Windows Explorer uses case-insensitive natural sorting
-        import re
-        def natural_sort_key(path):
-            def convert(text):
-                return int(text) if text.isdigit() else text.lower()
-            return [convert(c) for c in re.split(r'(\d+)', path.name)]
-        files.sort(key=natural_sort_key)
-    else:  # Linux and other Unix-like systems
-        # Most Linux file managers use case-sensitive alphabetical by default
-        # but we'll use case-insensitive for better user experience
-        files.sort(key=lambda x: x.name.lower())
-    
-    return files
+# Keys followers pass on to the leader, besides the digits of a slide number
+FORWARDED_KEYS = ("Right", "Left", "space") + JUMP_KEYS
+
+class LeaderNavigation(Navigation):
+    """Navigation on the sync leader: keys move every instance at once, through sync_advance"""
+
+    def base_position(self):
+        viewer = self.viewer
+        return viewer.pending_position if viewer.pending_position is not None else viewer.position
+
+    def go_to(self, target):
+        self.viewer.sync_advance(target)
 
 class FullscreenImageViewer:
-    def __init__(self, image_files, display_time_ms=5000, dissolve_time_ms=1000, dissolve_frames=30):
+    def __init__(self, image_files, display_time_ms=5000, dissolve_time_ms=1000, dissolve_frames=30,
+                 quality=DEFAULT_QUALITY, transition=DEFAULT_TRANSITION, display_profile=None,
+                 frame_cache_path=None, shuffle=False, seed=None, profiler=None, dissolve_scale="auto",
+                 sync=None, stream=None, quarantine=None, load_timeout=DEFAULT_LOAD_TIMEOUT,
+                 read_ahead_mb=DEFAULT_BUDGET_MB, read_ahead_files=DEFAULT_FILES, metrics=None,
+                 prefetch_depth=0, workers=1):
+        # With an ImageStream, image_files stays empty: streamed images are shown
+        # once and not kept, so a stream that runs for days does not grow
         self.image_files = image_files
+        self.stream = stream
+        self.streamed_count = 0
+        # Set when the current streamed slide has had its display time
+        self.stream_due = False
+        # SyncLeader or SyncFollower when playing in lockstep with other instances
+        self.sync = sync
+        # Slides rendered ahead for synchronized starts, by play position
+        self.prepared = {}
+        self.pending_position = None
+        self.sync_wait_started = 0
+        self.sync_prepare_sent = 0
+        self.profiler = profiler
+        self.order = create_order(len(image_files), shuffle, seed)
+        self.position = 0
+        if shuffle:
+            print(f"Shuffling with seed {self.order.seed}")
         self.display_time_ms = display_time_ms
         self.dissolve_time_ms = dissolve_time_ms
         self.dissolve_frames = dissolve_frames
-        self.img_idx = 0
+        # Upcoming slides rendered in the background; 0 renders each when it is due
+        self.prefetch_depth = prefetch_depth
+        self.img_idx = self.order.index_at(self.position) if image_files else None
+        self.navigation = LeaderNavigation(self) if sync and sync.leader else Navigation(self)
         self.timer_id = None
         self.dissolve_id = None
         self.paused = False
@@ -50,74 +77,242 @@ class FullscreenImageViewer:
         self.next_img_canvas = None
         self.dissolving = False
         self.screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
-        self.root.bind("<Right>", self.next_image)
-        self.root.bind("<Left>", self.prev_image)
-        self.root.bind("<space>", self.toggle_pause)
+        # The same rendering pipeline as the launcher's viewer
+        self.renderer = SlideRenderer(image_files, self.screen_size, quality, transition,
+                                      display_profile, frame_cache_path, dissolve_scale,
+                                      quarantine=quarantine, load_timeout=load_timeout,
+                                      read_ahead_mb=read_ahead_mb, read_ahead_files=read_ahead_files,
+                                      metrics=metrics, prefetch_workers=workers)
+        self.zoomed_photo = None
+        self.transition_photo = None
+        if sync and not sync.leader:
+            # Followers pass navigation on to the leader, which moves every screen
+            for keysym in FORWARDED_KEYS:
+                self.root.bind(f"<{keysym}>", lambda e, k=keysym: self.sync.forward_key(k))
+            for digit in DIGITS:
+                self.root.bind(digit, lambda e, k=digit: self.sync.forward_key(k))
+        else:
+            self.root.bind("<Right>", self.next_image)
+            self.root.bind("<Left>", self.prev_image)
+            self.root.bind("<space>", self.toggle_pause)
+            if not stream:
+                # Streamed images have no order to jump around in
+                self.navigation.bind(self.root)
         self.root.bind("<Escape>", self.quit_app)
         self.root.bind("q", self.quit_app)
-        self.show_image(self.img_idx, dissolve=False)
-        self.root.mainloop()
-
-    def prepare_canvas(self, img_path):
-        """Resize image with aspect ratio, center it on transparent canvas"""
-        img = Image.open(img_path).convert('RGBA')
-        screen_width, screen_height = self.screen_size
-        img_ratio = img.width / img.height
-        screen_ratio = screen_width / screen_height
-
-        if img_ratio > screen_ratio:
-            new_width = screen_width
-            new_height = int(screen_width / img_ratio)
+        if stream:
+            self.stream.start(self.renderer)
+            self.stream_due = True
+            self.poll_stream()
         else:
-            new_height = screen_height
-            new_width = int(screen_height * img_ratio)
+            self.show_image(self.img_idx, dissolve=False)
+        if sync:
+            self.poll_sync()
+        self.root.mainloop()
 
-        img = img.resize((new_width, new_height), Image.LANCZOS)
-        canvas = Image.new('RGBA', (screen_width, screen_height), (0, 0, 0, 255))
-        offset_x = (screen_width - new_width) // 2
-        offset_y = (screen_height - new_height) // 2
-        canvas.paste(img, (offset_x, offset_y), mask=img)
-        return canvas
+    def show_image(self, idx, dissolve=True, slide=None, start=None, title=None):
+        """Show image idx, using the already rendered slide if given.
 
-    def show_image(self, idx, dissolve=True):
+        start is the time.perf_counter() time the transition began, when it
+        is shared with other instances. Streamed slides have no idx; they
+        come with their slide and the window title.
+        """
         if self.timer_id:
             self.root.after_cancel(self.timer_id)
             self.timer_id = None
         if self.dissolve_id:
             self.root.after_cancel(self.dissolve_id)
             self.dissolve_id = None
-        img_path = self.image_files[idx]
-        self.root.title(f"{img_path.name} ({idx+1}/{len(self.image_files)})")
-        new_canvas = self.prepare_canvas(img_path)
-        if dissolve and hasattr(self, "current_canvas"):
+        if title is None:
+            title = f"{self.image_files[idx].name} ({idx+1}/{len(self.image_files)})"
+        self.root.title(title)
+        if self.profiler:
+            self.profiler.slide_shown()
+        self.renderer.metrics.slide_shown()
+        dissolve = dissolve and hasattr(self, "current_canvas")
+        if slide is None:
+            slide = self.renderer.take_slide(idx)
+        new_canvas = slide[0]
+        if dissolve:
             self.dissolving = True
-            self.dissolve_step = 0
             self.next_img_canvas = new_canvas
+            self.renderer.start_transition(self.current_canvas, slide,
+                                           self.dissolve_time_ms / max(1, self.dissolve_frames))
+            self.transition_start = start if start is not None else time.perf_counter()
             self._dissolve_images()
         else:
             self.display_img(new_canvas)
             self.current_canvas = new_canvas
-            if not self.paused:
-                self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+            self.schedule_next()
 
     def _dissolve_images(self):
-        frames = self.dissolve_frames
-        step = self.dissolve_step
-        alpha = step / frames
-        blended = Image.blend(self.current_canvas, self.next_img_canvas, alpha)
-        photo = ImageTk.PhotoImage(blended)
-        self.label.config(image=photo)
-        self.label.image = photo
-        self.photo = photo
-        if step < frames:
-            self.dissolve_step += 1
-            self.dissolve_id = self.root.after(self.dissolve_time_ms // frames, self._dissolve_images)
+        # Progress follows the clock, so slow frames are dropped rather than
+        # stretching the transition
+        frame_start = time.perf_counter()
+        elapsed_ms = (frame_start - self.transition_start) * 1000
+        t = min(1.0, max(0.0, elapsed_ms / self.dissolve_time_ms)) if self.dissolve_time_ms > 0 else 1.0
+        if t < 1.0:
+            frame = self.renderer.transition_frame(t)
+            scale = self.renderer.active_scale
+            if self.transition_photo is None or self.transition_photo.width() != frame.width:
+                self.transition_photo = ImageTk.PhotoImage(frame)
+            else:
+                self.transition_photo.paste(frame)
+            photo = self.transition_photo
+            if scale > 1:
+                # Reduced frames are zoomed back to full size by Tk itself
+                width, height = self.screen_size
+                if self.zoomed_photo is None:
+                    self.zoomed_photo = tk.PhotoImage(master=self.root, width=width, height=height)
+                self.zoomed_photo.tk.call(self.zoomed_photo, "copy", self.transition_photo,
+                                          "-zoom", scale, scale,
+                                          "-to", 0, 0, width, height, "-compositingrule", "set")
+                photo = self.zoomed_photo
+            self.label.config(image=photo)
+            self.label.image = photo
+            self.photo = photo
+            frame_ms = (time.perf_counter() - frame_start) * 1000
+            self.renderer.record_frame(frame_ms)
+            # Frames fall on a fixed grid from the transition start, which
+            # synchronized instances share
+            interval = self.dissolve_time_ms / self.dissolve_frames
+            next_frame_ms = (int(elapsed_ms / interval) + 1) * interval
+            delay_ms = next_frame_ms - (time.perf_counter() - self.transition_start) * 1000
+            self.dissolve_id = self.root.after(max(1, int(delay_ms)), self._dissolve_images)
         else:
+            self.dissolve_id = None
+            if self.dissolve_frames > 0:
+                self.renderer.finish_transition(self.dissolve_time_ms / self.dissolve_frames)
+                self.renderer.metrics.transition_finished(elapsed_ms, self.dissolve_time_ms,
+                                                          self.dissolve_time_ms / self.dissolve_frames)
             self.display_img(self.next_img_canvas)
             self.current_canvas = self.next_img_canvas
             self.dissolving = False
-            if not self.paused:
-                self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+            self.schedule_next()
+
+    def schedule_next(self):
+        """Start the display timer for the current slide; followers wait for the leader instead"""
+        if not self.stream:
+            # Fetch the files of the next slides from disk while this one shows
+            depth = max(self.renderer.read_ahead_files, self.prefetch_depth)
+            # Synchronized shows step through every position, quarantined or not
+            upcoming = self.order.upcoming(self.position, depth, None if self.sync else self.renderer.playable)
+            self.renderer.read_ahead_upcoming(upcoming)
+            if self.prefetch_depth and not self.sync:
+                self.renderer.prefetch(upcoming[:self.prefetch_depth], current=self.img_idx)
+        if self.sync and not self.sync.leader:
+            return
+        if not self.paused:
+            self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+        if self.sync:
+            # Every instance renders the next slide while this one is on screen
+            self.sync_prepare(self.position + 1)
+
+    def sync_prepare(self, position):
+        """Render the slide at position in the background; followers acknowledge it when done"""
+        if position not in self.prepared:
+            future = self.renderer.submit(self.order.index_at(position))
+            self.prepared[position] = future
+            if not self.sync.leader:
+                future.add_done_callback(lambda f: self.sync.ready(position))
+        elif not self.sync.leader and self.prepared[position].done():
+            # The leader asked again, so the earlier acknowledgement may have been lost
+            self.sync.ready(position)
+        if self.sync.leader:
+            self.sync.prepare(position)
+            self.sync_prepare_sent = time.perf_counter()
+
+    def sync_advance(self, position):
+        """Leader: move every instance to position once all of them have it rendered"""
+        if self.timer_id:
+            self.root.after_cancel(self.timer_id)
+            self.timer_id = None
+        self.pending_position = position
+        self.sync_wait_started = time.perf_counter()
+        self.sync_prepare(position)
+        self._poll_sync_ready()
+
+    def _poll_sync_ready(self):
+        position = self.pending_position
+        if position is None:
+            return
+        now = time.perf_counter()
+        waited = now - self.sync_wait_started
+        if not self.prepared[position].done() or \
+                (not self.sync.all_ready(position) and waited < READY_TIMEOUT):
+            if now - self.sync_prepare_sent > 1.0:
+                # Reaches followers that joined since, or missed the first request
+                self.sync_prepare(position)
+            self.root.after(5, self._poll_sync_ready)
+            return
+        if waited >= READY_TIMEOUT:
+            print(f"Sync: not every follower has slide {position + 1} ready; starting anyway")
+        self.pending_position = None
+        self.start_position_at(position, self.sync.advance(position))
+
+    def start_position_at(self, position, start):
+        """Show the slide at play position, with its transition starting at perf_counter time start"""
+        delay_ms = max(0, int((start - time.perf_counter()) * 1000))
+        self.root.after(delay_ms, lambda: self.show_position(position, start))
+
+    def show_position(self, position, start):
+        # A late follower cuts its previous transition short to keep up
+        self.interrupt()
+        slide = None
+        future = self.prepared.pop(position, None)
+        if future is not None:
+            try:
+                slide = future.result()
+            except Exception as e:
+                print(f"Error preparing slide {position + 1}: {e}")
+        for other in [p for p in self.prepared if p < position]:
+            self.prepared.pop(other).cancel()
+        self.position = position
+        self.img_idx = self.order.index_at(position)
+        self.show_image(self.img_idx, dissolve=True, slide=slide, start=start)
+
+    def poll_sync(self):
+        """Handle messages from the other instances"""
+        for message, address in self.sync.poll():
+            kind = message.get("type")
+            position = message.get("position")
+            start = message.get("start")
+            if kind in ("prepare", "advance") and (not isinstance(position, int) or isinstance(position, bool)):
+                print(f"Sync: ignoring {kind} message without a position from {address}")
+            elif kind == "prepare":
+                self.sync_prepare(position)
+            elif kind == "advance":
+                if isinstance(start, (int, float)) and not isinstance(start, bool):
+                    self.start_position_at(position, self.sync.to_local(start))
+                else:
+                    print(f"Sync: ignoring advance message without a start time from {address}")
+            elif kind == "key" and self.sync.leader:
+                keysym = message.get("keysym")
+                if keysym == "Right":
+                    self.navigation.navigate(1)
+                elif keysym == "Left":
+                    self.navigation.navigate(-1)
+                elif keysym == "space":
+                    self.toggle_pause()
+                elif isinstance(keysym, str):
+                    self.navigation.handle_key(keysym)
+        self.root.after(10, self.poll_sync)
+
+    def poll_stream(self):
+        """Show the next streamed slide as soon as it has arrived and the current one is due"""
+        if self.stream_due and not self.dissolving:
+            self.show_next_streamed()
+        self.root.after(20, self.poll_stream)
+
+    def show_next_streamed(self):
+        item = self.stream.get()
+        if item is None:
+            # Nothing new yet; the current slide stays up until something arrives
+            return
+        image, slide = item
+        self.stream_due = False
+        self.streamed_count += 1
+        self.show_image(None, dissolve=True, slide=slide, title=f"{image.name} (#{self.streamed_count})")
 
     def display_img(self, img):
         photo = ImageTk.PhotoImage(img)
@@ -126,17 +321,53 @@ class FullscreenImageViewer:
         self.photo = photo
 
     def next_image(self, event=None):
+        if event is not None and not self.stream:
+            # Keyboard navigation is coalesced and never blocks on decoding
+            self.navigation.navigate(1)
+            return
         if self.dissolving:
             return
-        self.img_idx = (self.img_idx + 1) % len(self.image_files)
+        if self.stream:
+            self.stream_due = True
+            self.show_next_streamed()
+            return
+        if self.sync:
+            base = self.pending_position if self.pending_position is not None else self.position
+            self.sync_advance(base + 1)
+            return
+        # Images that failed to load before are stepped over
+        self.position = self.renderer.playable_position(self.order, self.position + 1)
+        self.img_idx = self.order.index_at(self.position)
         self.show_image(self.img_idx, dissolve=True)
 
     def prev_image(self, event=None):
+        if self.stream:
+            return
+        if event is not None:
+            self.navigation.navigate(-1)
+            return
         if self.dissolving:
             return
-        self.img_idx = (self.img_idx - 1) % len(self.image_files)
+        if self.sync:
+            base = self.pending_position if self.pending_position is not None else self.position
+            self.sync_advance(base - 1)
+            return
+        self.position = self.renderer.playable_position(self.order, self.position - 1, -1)
+        self.img_idx = self.order.index_at(self.position)
         self.show_image(self.img_idx, dissolve=True)
 
+    def interrupt(self):
+        """Stop the slide timer and jump any running transition to its end"""
+        if self.timer_id:
+            self.root.after_cancel(self.timer_id)
+            self.timer_id = None
+        if self.dissolving:
+            if self.dissolve_id:
+                self.root.after_cancel(self.dissolve_id)
+                self.dissolve_id = None
+            self.current_canvas = self.next_img_canvas
+            self.dissolving = False
+
     def toggle_pause(self, event=None):
         """Toggle pause/resume of the slideshow"""
         if self.dissolving:
@@ -158,50 +389,256 @@ class FullscreenImageViewer:
             self.root.after_cancel(self.timer_id)
         if self.dissolve_id:
             self.root.after_cancel(self.dissolve_id)
+        self.navigation.close()
+        if self.sync:
+            self.sync.close()
+        if self.stream:
+            self.stream.close()
+        self.renderer.close()
+        close_archives()
         self.root.destroy()
 
+def positive_seconds(value):
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = 0
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"Invalid display time '{value}'. Must be a positive number.")
+    return seconds
+
+def non_negative_seconds(value):
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = -1
+    if seconds < 0:
+        raise argparse.ArgumentTypeError(f"Invalid dissolve time '{value}'. Must be a non-negative number.")
+    return seconds
+
+def screen_size(value):
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size '{value}'. Use WIDTHxHEIGHT, e.g. 1920x1080.")
+
+def layout(value):
+    try:
+        return parse_layout(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def calibrated_settings(args, screen_size, root=None):
+    """Settings calibrated for this machine at screen_size, or none with --no-calibrate"""
+    if args.no_calibrate:
+        return {}
+    return Calibration(default_calibration_path()).settings(screen_size, root, args.recalibrate)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Full-screen slideshow of the images in a directory")
+    parser.add_argument("directory",
+                        help="Path to directory (or ZIP/TAR archive) containing images; with --ingest, "
+                             "where images arrive from: - (stdin), a named pipe, HOST:PORT or a socket path")
+    parser.add_argument("display_time_seconds", nargs="?", type=positive_seconds, default=5.0,
+                        help="Duration to show each image (default: 5.0)")
+    parser.add_argument("dissolve_time_seconds", nargs="?", type=non_negative_seconds, default=1.0,
+                        help="Duration of dissolve transition (default: 1.0)")
+    parser.add_argument("--quality", choices=list(QUALITY_REDUCING_GAPS),
+                        help=f"Resampling quality tier (default: calibrated for this machine, else {DEFAULT_QUALITY})")
+    parser.add_argument("--transition", choices=list(TRANSITIONS), default=DEFAULT_TRANSITION,
+                        help=f"Transition effect between images (default: {DEFAULT_TRANSITION})")
+    parser.add_argument("--dissolve-scale", choices=["auto", "1", "2", "3", "4"], default="auto",
+                        help="Compute transition frames at 1/N of screen resolution (default: auto, from frame timing)")
+    parser.add_argument("--layout", type=layout, metavar="2up|COLUMNSxROWS",
+                        help="Show several images per slide: 2up (side by side) or a grid such as 2x2 or 3x3")
+    parser.add_argument("--display-profile", metavar="ICC_FILE",
+                        help="ICC profile of the display to convert images to (default: sRGB)")
+    parser.add_argument("--shuffle", action="store_true",
+                        help="Play in random order, without repeats within each loop")
+    parser.add_argument("--seed", type=int, help="Seed for --shuffle, to repeat a previous order")
+    parser.add_argument("--profile", nargs="?", const=".", metavar="DIR",
+                        help="Profile the session (cProfile + tracemalloc) and write a report into DIR (default: .)")
+    parser.add_argument("--prerender", action="store_true",
+                        help="Render every image into the frame cache for this screen size, then exit")
+    parser.add_argument("--size", type=screen_size, metavar="WIDTHxHEIGHT",
+                        help="Screen size to pre-render for (default: this screen)")
+    parser.add_argument("--frame-cache", metavar="PATH",
+                        help="Frame cache file (default: .slideshow_frames in the image directory)")
+    parser.add_argument("--workers", type=int,
+                        help="Threads rendering upcoming slides (default: calibrated, else 1); "
+                             "processes used by --prerender (default: all cores)")
+    parser.add_argument("--frames", type=int, metavar="N",
+                        help="Frames per transition (default: calibrated for this machine, else 30; "
+                             "always 30 in synchronized playback)")
+    parser.add_argument("--prefetch-depth", type=int, metavar="N",
+                        help="Upcoming slides rendered in the background (default: calibrated, else 0 - "
+                             "each slide is rendered when it is due)")
+    parser.add_argument("--recalibrate", action="store_true",
+                        help="Measure this machine again instead of using its saved calibration")
+    parser.add_argument("--no-calibrate", action="store_true",
+                        help="Use the fixed defaults instead of settings calibrated for this machine")
+    parser.add_argument("--load-timeout", type=float, default=DEFAULT_LOAD_TIMEOUT, metavar="SECONDS",
+                        help=f"Give up on an image that takes longer to load, and quarantine it "
+                             f"(default: {DEFAULT_LOAD_TIMEOUT:g}; 0 waits forever)")
+    parser.add_argument("--quarantine", metavar="PATH", default=default_quarantine_path(),
+                        help="File remembering images that failed to load, which are skipped until they change")
+    parser.add_argument("--quarantine-report", action="store_true",
+                        help="List the quarantined images of the directory with the reasons, then exit")
+    parser.add_argument("--clear-quarantine", action="store_true",
+                        help="Forget every quarantined image, so all are tried again")
+    parser.add_argument("--read-ahead", type=int, default=DEFAULT_BUDGET_MB, metavar="MB",
+                        help=f"Memory for reading upcoming files ahead of decoding, for slow disks and network "
+                             f"shares (default: {DEFAULT_BUDGET_MB}; 0 turns it off)")
+    parser.add_argument("--read-ahead-files", type=int, default=DEFAULT_FILES, metavar="N",
+                        help=f"How many upcoming files to read ahead (default: {DEFAULT_FILES})")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write health metrics to PATH every --metrics-interval seconds: JSON if it ends "
+                             "in .json, Prometheus text format otherwise")
+    parser.add_argument("--metrics-listen", metavar="ADDRESS",
+                        help="Serve health metrics in Prometheus text format on HOST:PORT or a socket path")
+    parser.add_argument("--metrics-interval", type=positive_seconds, default=DEFAULT_INTERVAL, metavar="SECONDS",
+                        help=f"Seconds between writes of the --metrics file (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument("--ingest", action="store_true",
+                        help="Show images as they are pushed to the source given as directory, "
+                             "one path per line or 'IMAGE <length>' followed by the encoded bytes")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Images --ingest holds waiting to be decoded and to be shown (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--queue-policy", choices=QUEUE_POLICIES, default="block",
+                        help="When the --ingest queue is full: block the producer, or drop the oldest image "
+                             "to stay live (default: block)")
+    sync = parser.add_mutually_exclusive_group()
+    sync.add_argument("--sync-lead", metavar="ADDRESS",
+                      help="Lead synchronized playback on HOST:PORT (UDP) or a socket file path")
+    sync.add_argument("--sync-follow", metavar="ADDRESS",
+                      help="Follow the synchronized playback led at ADDRESS")
+    args = parser.parse_args(argv)
+    if args.ingest and (args.prerender or args.shuffle or args.sync_lead or args.sync_follow or args.layout):
+        parser.error("--ingest cannot be combined with --prerender, --shuffle, --layout or synchronized playback")
+    if args.layout and args.prerender:
+        parser.error("--prerender renders single images; it cannot be combined with --layout")
+    if args.queue_size < 1:
+        parser.error("--queue-size must be at least 1")
+    if args.frames is not None and args.frames < 1:
+        parser.error("--frames must be at least 1")
+    if args.prefetch_depth is not None and args.prefetch_depth < 0:
+        parser.error("--prefetch-depth cannot be negative")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.recalibrate and args.no_calibrate:
+        parser.error("--recalibrate and --no-calibrate cannot be combined")
+    return args
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python slide_show.py <directory> [display_time_seconds] [dissolve_time_seconds]")
-        print("  directory: Path to directory containing images")
-        print("  display_time_seconds: Duration to show each image (default: 5.0)")
-        print("  dissolve_time_seconds: Duration of dissolve transition (default: 1.0)")
-        sys.exit(1)
-    
-    directory = sys.argv[1]
+    args = parse_args()
+    directory = args.directory
+    display_time_seconds = args.display_time_seconds
+    dissolve_time_seconds = args.dissolve_time_seconds
     
-    # Parse optional timing arguments
-    display_time_seconds = 5.0  # default 5 seconds
-    dissolve_time_seconds = 1.0  # default 1 second
-    
-    if len(sys.argv) >= 3:
+    frame_cache_path = None if args.ingest else args.frame_cache or default_cache_path(directory)
+    if args.prerender:
+        size = args.size
+        root = None
+        if size is None:
+            root = tk.Tk()
+            root.withdraw()
+            size = (root.winfo_screenwidth(), root.winfo_screenheight())
+        # The show only uses frames rendered at its own quality, calibrated unless --quality is given
+        quality = args.quality or calibrated_settings(args, size, root).get("quality", DEFAULT_QUALITY)
+        if root is not None:
+            root.destroy()
         try:
-            display_time_seconds = float(sys.argv[2])
-            if display_time_seconds <= 0:
-                raise ValueError("Display time must be positive")
+            prerender(directory, size, frame_cache_path, quality, args.display_profile, args.workers)
         except ValueError as e:
-            print(f"Error: Invalid display time '{sys.argv[2]}'. Must be a positive number.")
+            print(f"Error: {e}")
             sys.exit(1)
+        sys.exit(0)
     
-    if len(sys.argv) >= 4:
-        try:
-            dissolve_time_seconds = float(sys.argv[3])
-            if dissolve_time_seconds < 0:
-                raise ValueError("Dissolve time must be non-negative")
-        except ValueError as e:
-            print(f"Error: Invalid dissolve time '{sys.argv[3]}'. Must be a non-negative number.")
-            sys.exit(1)
+    quarantine = Quarantine(args.quarantine)
+    if args.clear_quarantine:
+        quarantine.clear()
+        print(f"Quarantine cleared ({args.quarantine})")
+    if args.quarantine_report:
+        print("\n".join(quarantine.report(None if args.ingest else get_image_files(directory))))
+        sys.exit(0)
     
     # Convert to milliseconds for the viewer
     display_time_ms = int(display_time_seconds * 1000)
     dissolve_time_ms = int(dissolve_time_seconds * 1000)
     
-    image_files = get_image_files(directory)
-    if not image_files:
-        print("No image files found.")
+    # Settings measured for this machine and screen; options given on the command line win
+    tuned = {}
+    if not args.no_calibrate:
+        root = tk.Tk()
+        root.withdraw()
+        tuned = calibrated_settings(args, (root.winfo_screenwidth(), root.winfo_screenheight()), root)
+        root.destroy()
+    quality = args.quality or tuned.get("quality", DEFAULT_QUALITY)
+    # Synchronized screens must share one frame grid, which calibration per machine would not give
+    synchronized = args.sync_lead or args.sync_follow
+    frames = args.frames or (dissolve_frames(tuned["frames_per_second"], dissolve_time_ms)
+                             if "frames_per_second" in tuned and not synchronized else 30)
+    prefetch_depth = args.prefetch_depth if args.prefetch_depth is not None else tuned.get("prefetch_depth", 0)
+    workers = args.workers or tuned.get("workers", 1)
+    
+    stream = None
+    if args.ingest:
+        stream = ImageStream(directory, args.queue_size, args.queue_policy)
+        try:
+            stream.open()
+        except (OSError, ValueError) as e:
+            print(f"Error: could not open ingest source {directory}: {e}")
+            sys.exit(1)
+        image_files = []
+    else:
+        image_files = get_image_files(directory)
+        if not image_files:
+            print("No image files found.")
+            sys.exit(1)
+        print(f"Starting slideshow with {len(image_files)} images")
+        if args.layout:
+            columns, rows = args.layout
+            image_files = group_pages(image_files, columns, rows)
+            print(f"{columns}x{rows} layout: {len(image_files)} slides")
+    print(f"Display time: {display_time_seconds}s, Dissolve time: {dissolve_time_seconds}s, Quality: {quality}, "
+          f"{frames} transition frames, prefetching {prefetch_depth} slides with {workers} workers")
+    
+    try:
+        if args.sync_lead:
+            sync = SyncLeader(args.sync_lead)
+        elif args.sync_follow:
+            sync = SyncFollower(args.sync_follow)
+        else:
+            sync = None
+    except (OSError, ValueError) as e:
+        print(f"Error: could not open sync socket: {e}")
         sys.exit(1)
     
-    print(f"Starting slideshow with {len(image_files)} images")
-    print(f"Display time: {display_time_seconds}s, Dissolve time: {dissolve_time_seconds}s")
+    metrics = Metrics()
+    exporter = None
+    if args.metrics or args.metrics_listen:
+        exporter = MetricsExporter(metrics, args.metrics, args.metrics_listen, args.metrics_interval)
+        try:
+            exporter.open()
+        except (OSError, ValueError) as e:
+            print(f"Error: could not open metrics socket {args.metrics_listen}: {e}")
+            sys.exit(1)
+        exporter.start()
     
-    FullscreenImageViewer(image_files, display_time_ms, dissolve_time_ms)
+    profiler = SessionProfiler(args.profile) if args.profile else None
+    if profiler:
+        profiler.start()
+    try:
+        FullscreenImageViewer(image_files, display_time_ms, dissolve_time_ms, frames, quality=quality,
+                              transition=args.transition, display_profile=args.display_profile,
+                              frame_cache_path=frame_cache_path, shuffle=args.shuffle, seed=args.seed,
+                              profiler=profiler, dissolve_scale=args.dissolve_scale, sync=sync, stream=stream,
+                              quarantine=quarantine, load_timeout=args.load_timeout,
+                              read_ahead_mb=args.read_ahead, read_ahead_files=args.read_ahead_files,
+                              metrics=metrics, prefetch_depth=prefetch_depth, workers=workers)
+    finally:
+        if exporter:
+            exporter.close()
+        # Runs however the window was closed, so the report is always written
+        if profiler:
+            profiler.stop()
@@ -6,59 +6,143 @@ A unified interface for selecting directories and slideshow settings
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
+import argparse
+import heapq
 import sys
 import os
-import platform
-import locale
-from pathlib import Path
-from PIL import Image, ImageTk, ExifTags
+import queue
+import threading
+import time
+from PIL import Image, ImageTk
+from transitions import TRANSITIONS, DEFAULT_TRANSITION
+from archive_source import close_archives, is_archive
+from frame_cache import default_cache_path
+from renderer import DEFAULT_QUALITY, QUALITY_REDUCING_GAPS, PyramidCache, SlideRenderer, get_image_files
+from navigation import Navigation
+from playback_order import create_order
+from session_profiler import SessionProfiler
+from quarantine import DEFAULT_LOAD_TIMEOUT, Quarantine, default_quarantine_path
+from metrics import DEFAULT_INTERVAL, Metrics, MetricsExporter
+from calibration import Calibration, default_calibration_path, dissolve_frames
 class SlideshowApp:
     def update_thumbnails(self):
-        # Clear previous thumbnails
+        """Rebuild the thumbnail strip for the current directory.
+
+        Placeholders are laid out immediately and the actual thumbnails are
+        decoded by a background ThumbnailLoader, visible rows first.
+        """
+        # Cancel any work still queued for the previous directory
+        self.thumbnail_loader.cancel()
         for widget in self.thumbnail_frame.winfo_children():
             widget.destroy()
         self.thumbnails = []
+        self.thumbnail_rows = []
         directory = self.directory_var.get().strip()
+        self.thumbnail_directory = directory
         if not directory or not os.path.exists(directory):
+            self.update_total_time_display()
             return
         image_files = get_image_files(directory)
         for idx, img_path in enumerate(image_files):
-            try:
-                img = Image.open(img_path)
-                img.thumbnail((96, 96))
-                thumb = ImageTk.PhotoImage(img)
-                if idx == self.selected_thumbnail_idx:
-                    # Create a white frame as border
-                    border_frame = tk.Frame(self.thumbnail_frame, bg="white", bd=0)
-                    border_frame.grid(row=idx, column=0, pady=2, padx=2, sticky="e")
-                    lbl = tk.Label(border_frame, image=thumb, relief="flat", bd=0, bg="#444")
-                    lbl.pack(padx=2, pady=2)  # This creates the white border effect
-                    lbl.bind("<Button-1>", lambda e, i=idx: self.on_thumbnail_click(i))
-                    self.thumbnails.append(lbl)
-                else:
-                    lbl = tk.Label(self.thumbnail_frame, image=thumb, relief="flat", bd=0, bg="#222")
-                    lbl.grid(row=idx, column=0, pady=2, padx=2, sticky="e")
-                    lbl.bind("<Button-1>", lambda e, i=idx: self.on_thumbnail_click(i))
-                    self.thumbnails.append(lbl)
-                lbl.image = thumb
-            except Exception as e:
-                print(f"Error loading thumbnail for {img_path}: {e}")
+            # Every row is a frame so the selection border can be toggled
+            # without touching (or re-decoding) the thumbnail itself
+            row = tk.Frame(self.thumbnail_frame, bg="#222", bd=0)
+            row.grid(row=idx, column=0, pady=2, padx=2, sticky="e")
+            lbl = tk.Label(row, image=self.thumbnail_placeholder, relief="flat", bd=0, bg="#222")
+            lbl.pack(padx=0, pady=0)
+            lbl.image = self.thumbnail_placeholder
+            for widget in (row, lbl):
+                widget.bind("<Button-1>", lambda e, i=idx: self.on_thumbnail_click(i))
+            self.thumbnail_rows.append(row)
+            self.thumbnails.append(lbl)
+        self.style_thumbnail(self.selected_thumbnail_idx, True)
+        self.thumbnail_frame.update_idletasks()
+        self.thumbnail_loader.load(image_files, self.visible_thumbnail_rows())
+        self.prepare_start_canvas()
         
         # Update total time display when images change
         self.update_total_time_display()
 
+    def poll_thumbnails(self):
+        """Move decoded thumbnails from the loader onto their labels (Tk thread only)"""
+        for idx, img in self.thumbnail_loader.drain():
+            if idx >= len(self.thumbnails):
+                continue
+            try:
+                thumb = ImageTk.PhotoImage(img)
+            except Exception as e:
+                print(f"Error creating thumbnail image: {e}")
+                continue
+            lbl = self.thumbnails[idx]
+            lbl.configure(image=thumb, bg="#444" if idx == self.selected_thumbnail_idx else "#222")
+            lbl.image = thumb
+        self.root.after(30, self.poll_thumbnails)
+
+    def visible_thumbnail_rows(self):
+        """Return the (first, last) row indices currently visible in the strip"""
+        count = len(self.thumbnails)
+        if not count:
+            return (0, 0)
+        top, bottom = self.thumbnail_canvas.yview()
+        return (int(top * count), min(count - 1, int(bottom * count) + 1))
+
+    def on_thumbnail_scroll(self, first, last):
+        self.thumbnail_scrollbar.set(first, last)
+        # Let the loader pick up whatever has just scrolled into view first
+        self.thumbnail_loader.set_visible(self.visible_thumbnail_rows())
+
+    def style_thumbnail(self, idx, selected):
+        if idx is None or idx >= len(self.thumbnails):
+            return
+        row = self.thumbnail_rows[idx]
+        lbl = self.thumbnails[idx]
+        # Selected thumbnails get a white border
+        row.configure(bg="white" if selected else "#222")
+        lbl.configure(bg="#444" if selected else "#222")
+        pad = 2 if selected else 0
+        lbl.pack_configure(padx=pad, pady=pad)
+
     def on_thumbnail_click(self, idx):
+        # Only the border changes; thumbnails are never decoded again
+        self.style_thumbnail(self.selected_thumbnail_idx, False)
         self.selected_thumbnail_idx = idx
-        # First, clear all existing thumbnails and recreate them with proper styling
-        self.update_thumbnails()
+        self.style_thumbnail(idx, True)
         self.thumbnail_frame.update_idletasks()
+        self.prepare_start_canvas()
+
+    def prepare_start_canvas(self, *args):
+        """Have the thumbnail loader render the slide the show would open with, at the show's size"""
+        if not self.thumbnails:
+            return
+        idx = self.selected_thumbnail_idx if self.selected_thumbnail_idx is not None else 0
+        # Zooming transitions open with an oversampled rendering
+        oversample = TRANSITIONS[self.transition_var.get()].oversample
+        size = (int(self.root.winfo_screenwidth() * oversample), int(self.root.winfo_screenheight() * oversample))
+        self.thumbnail_loader.prepare_start(idx, size, self.quality_var.get())
+
+    def on_directory_entry_typing(self, event=None):
+        """Reload thumbnails shortly after the user stops typing a directory"""
+        if self.directory_entry_after_id:
+            self.root.after_cancel(self.directory_entry_after_id)
+        self.directory_entry_after_id = self.root.after(400, self.on_directory_entry_settled)
+
+    def on_directory_entry_settled(self):
+        self.directory_entry_after_id = None
+        directory = self.directory_var.get().strip()
+        # Stop decoding thumbnails for a directory the user has typed past
+        if directory != self.thumbnail_directory:
+            self.thumbnail_loader.cancel()
+        if directory and (os.path.isdir(directory) or is_archive(directory)) and directory != self.thumbnail_directory:
+            self.update_thumbnails()
+
     def on_directory_entry_change(self, event=None):
         """Handle manual directory entry - validate, save, and update thumbnails"""
         directory = self.directory_var.get().strip()
-        if directory and os.path.exists(directory) and os.path.isdir(directory):
-            # Valid directory - save it and update thumbnails
+        if directory and (os.path.isdir(directory) or is_archive(directory)):
+            # Valid directory - save it and update thumbnails if it changed
             self.save_last_directory(directory)
-            self.update_thumbnails()
+            if directory != self.thumbnail_directory:
+                self.update_thumbnails()
         elif directory:
             # Invalid directory - create a temporary style with red background
             style = ttk.Style()
@@ -96,12 +180,22 @@ class SlideshowApp:
                         self.directory_var.set(last_dir)
             except Exception as e:
                 print(f"Could not load last directory: {e}")
-    def __init__(self):
+    def __init__(self, profiler=None, metrics=None, calibration=None, recalibrate=False, overrides=None):
+        self.profiler = profiler
+        # Health counters of every show started from here (see --metrics)
+        self.metrics = metrics
         self.root = tk.Tk()
         self.root.title("SlideShow")
-        self.root.geometry("680x500")
+        self.root.geometry("680x570")
         self.root.resizable(False, False)
         self.center_window()
+        # Transition frames, quality, prefetch depth and workers measured for
+        # this machine and screen; options given on the command line win
+        self.tuned = {}
+        if calibration is not None:
+            screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+            self.tuned = calibration.settings(screen_size, self.root, recalibrate)
+        self.overrides = overrides or {}
         # Store config in ~/Library/Application Support/SlideShow/
         config_dir = os.path.expanduser("~/Library/Application Support/SlideShow")
         os.makedirs(config_dir, exist_ok=True)
@@ -110,9 +204,23 @@ class SlideshowApp:
         self.display_time_var = tk.StringVar(value="10")
         self.dissolve_time_var = tk.StringVar(value="1")
         self.loop_var = tk.BooleanVar(value=True)  # Loop by default
+        self.shuffle_var = tk.BooleanVar(value=False)
+        self.quality_var = tk.StringVar(value=self.tuned.get("quality", DEFAULT_QUALITY))
+        self.transition_var = tk.StringVar(value=DEFAULT_TRANSITION)
         self.selected_thumbnail_idx = None
+        self.thumbnails = []
+        self.thumbnail_rows = []
+        self.thumbnail_directory = None
+        self.directory_entry_after_id = None
+        # Shared with the viewer, so the first slide is not decoded twice
+        self.pyramid_cache = PyramidCache()
+        # Images that failed to load, skipped by every show until they change
+        self.quarantine = Quarantine(default_quarantine_path())
+        self.thumbnail_loader = ThumbnailLoader(self.pyramid_cache)
+        self.thumbnail_placeholder = tk.PhotoImage(width=96, height=72)
         self.load_last_directory()
         self.setup_ui()
+        self.poll_thumbnails()
         initial_dir = self.directory_var.get().strip()
         if initial_dir:
             self.update_thumbnails()
@@ -147,11 +255,11 @@ class SlideshowApp:
 
         thumb_panel = tk.Frame(main_frame)
         thumb_panel.grid(row=0, column=0, rowspan=4, sticky="nsw", padx=(0, 20))
-        self.thumbnail_canvas = tk.Canvas(thumb_panel, width=106, height=500, bg="#000", highlightthickness=0, bd=0)
+        self.thumbnail_canvas = tk.Canvas(thumb_panel, width=106, height=570, bg="#000", highlightthickness=0, bd=0)
         self.thumbnail_canvas.grid(row=0, column=0, sticky="nsw")
         self.thumbnail_scrollbar = tk.Scrollbar(thumb_panel, orient="vertical", command=self.thumbnail_canvas.yview)
         self.thumbnail_scrollbar.grid(row=0, column=1, sticky="nsw")
-        self.thumbnail_canvas.configure(yscrollcommand=self.thumbnail_scrollbar.set)
+        self.thumbnail_canvas.configure(yscrollcommand=self.on_thumbnail_scroll)
         self.thumbnail_frame = tk.Frame(self.thumbnail_canvas, bg="#222")
         self.thumbnail_canvas.create_window((0, 0), window=self.thumbnail_frame, anchor="nw")
         self.thumbnail_frame.bind("<Configure>", lambda e: self.thumbnail_canvas.configure(scrollregion=self.thumbnail_canvas.bbox("all")))
@@ -170,6 +278,7 @@ class SlideshowApp:
         self.dir_entry.grid(row=1, column=0, columnspan=2, sticky="ew", padx=(2, 0))
         self.dir_entry.bind("<Return>", self.on_directory_entry_change)
         self.dir_entry.bind("<FocusOut>", self.on_directory_entry_change)
+        self.dir_entry.bind("<KeyRelease>", self.on_directory_entry_typing)
         browse_btn = ttk.Button(dir_frame, text="Browse...", command=self.browse_directory)
         browse_btn.grid(row=1, column=2, sticky="w")
         
@@ -179,7 +288,11 @@ class SlideshowApp:
         
         # Loop checkbox
         self.loop_checkbox = ttk.Checkbutton(dir_frame, text="Loop slideshow", variable=self.loop_var)
-        self.loop_checkbox.grid(row=3, column=0, columnspan=3, sticky="w", padx=(2, 0), pady=(5, 0))
+        self.loop_checkbox.grid(row=3, column=0, sticky="w", padx=(2, 0), pady=(5, 0))
+        
+        # Shuffle checkbox, next to Loop
+        self.shuffle_checkbox = ttk.Checkbutton(dir_frame, text="Shuffle", variable=self.shuffle_var)
+        self.shuffle_checkbox.grid(row=3, column=1, columnspan=2, sticky="w", padx=(2, 0), pady=(5, 0))
         
         self.update_total_time_display()
 
@@ -197,6 +310,17 @@ class SlideshowApp:
         self.dissolve_entry.grid(row=1, column=1, sticky="ew", padx=(0, 5))
         self.dissolve_entry.bind("<FocusOut>", self.validate_numeric_input("dissolve_time_var"))
         self.dissolve_entry.bind("<KeyRelease>", lambda e: self.root.after_idle(self.update_total_time_display))
+        ttk.Label(inner_settings, text="Quality", font=("Verdana", 14)).grid(row=2, column=0, sticky=tk.E, pady=(0, 2), padx=(0, 5))
+        self.quality_combo = ttk.Combobox(inner_settings, textvariable=self.quality_var, values=list(QUALITY_REDUCING_GAPS),
+                                          state="readonly", font=("Verdana", 14), width=8)
+        self.quality_combo.grid(row=2, column=1, sticky="ew", padx=(0, 5))
+        ttk.Label(inner_settings, text="Transition", font=("Verdana", 14)).grid(row=3, column=0, sticky=tk.E, pady=(0, 2), padx=(0, 5))
+        self.transition_combo = ttk.Combobox(inner_settings, textvariable=self.transition_var, values=list(TRANSITIONS),
+                                             state="readonly", font=("Verdana", 14), width=8)
+        self.transition_combo.grid(row=3, column=1, sticky="ew", padx=(0, 5))
+        # The opening slide is rendered for the chosen quality and transition
+        for combo in (self.quality_combo, self.transition_combo):
+            combo.bind("<<ComboboxSelected>>", self.prepare_start_canvas)
 
         # START button and its event handlers
         button_frame = tk.Frame(settings_frame, bg="#88aa88", relief="flat", bd=0)
@@ -290,11 +414,20 @@ class SlideshowApp:
         self.root.withdraw()
         # Determine starting index
         start_idx = self.selected_thumbnail_idx if self.selected_thumbnail_idx is not None else 0
+        frames = self.overrides.get("frames")
+        if frames is None:
+            frames = dissolve_frames(self.tuned["frames_per_second"], int(dissolve_time * 1000)) \
+                if "frames_per_second" in self.tuned else 30
+        prefetch_depth = self.overrides.get("prefetch_depth")
+        if prefetch_depth is None:
+            prefetch_depth = self.tuned.get("prefetch_depth", 2)
+        workers = self.overrides.get("workers") or self.tuned.get("workers", 1)
         # Launch slideshow
         FullscreenImageViewer(
             image_files,
             display_time_ms=int(display_time * 1000),
             dissolve_time_ms=int(dissolve_time * 1000),
+            dissolve_frames=frames,
             launcher_app=self,
             directory=directory,
             display_time=display_time,
@@ -302,7 +435,17 @@ class SlideshowApp:
             display_time_str=self.display_time_var.get(),
             dissolve_time_str=self.dissolve_time_var.get(),
             start_idx=start_idx,
-            loop_enabled=self.loop_var.get()
+            loop_enabled=self.loop_var.get(),
+            quality=self.quality_var.get(),
+            transition=self.transition_var.get(),
+            frame_cache_path=default_cache_path(directory),
+            shuffle=self.shuffle_var.get(),
+            profiler=self.profiler,
+            pyramid_cache=self.pyramid_cache,
+            quarantine=self.quarantine,
+            metrics=self.metrics,
+            prefetch_depth=prefetch_depth,
+            workers=workers
         )
 
         
@@ -352,75 +495,166 @@ class SlideshowApp:
     def run(self):
         self.root.mainloop()
 
-def get_image_files(directory):
-    exts = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tiff', '.tif')
-    files = [f for f in Path(directory).iterdir() if f.suffix.lower() in exts and f.is_file()]
-    
-    # Sort according to the operating system's default file sorting
-    system = platform.system()
-    
-    if system == "Darwin":  # macOS
-        # Use locale-aware sorting like Finder
-        files.sort(key=lambda x: locale.strxfrm(x.name.lower()))
-    elif system == "Windows":
-        # Windows Explorer uses case-insensitive natural sorting
-        import re
-        def natural_sort_key(path):
-            def convert(text):
-                return int(text) if text.isdigit() else text.lower()
-            return [convert(c) for c in re.split(r'(\d+)', path.name)]
-        files.sort(key=natural_sort_key)
-    else:  # Linux and other Unix-like systems
-        # Most Linux file managers use case-sensitive alphabetical by default
-        # but we'll use case-insensitive for better user experience
-        files.sort(key=lambda x: x.name.lower())
-    
-    return files
+class ThumbnailLoader:
+    """Decode launcher thumbnails on background threads.
 
-def apply_exif_orientation(image):
-    """Apply EXIF orientation to image if present"""
-    try:
-        # Get EXIF data
-        exif = image._getexif()
-        if exif is not None:
-            # Find orientation tag
-            for tag, value in exif.items():
-                if ExifTags.TAGS.get(tag) == 'Orientation':
-                    # Apply rotation based on orientation value
-                    if value == 2:
-                        image = image.transpose(Image.FLIP_LEFT_RIGHT)
-                    elif value == 3:
-                        image = image.rotate(180, expand=True)
-                    elif value == 4:
-                        image = image.transpose(Image.FLIP_TOP_BOTTOM)
-                    elif value == 5:
-                        image = image.transpose(Image.FLIP_LEFT_RIGHT).rotate(90, expand=True)
-                    elif value == 6:
-                        image = image.rotate(270, expand=True)
-                    elif value == 7:
-                        image = image.transpose(Image.FLIP_LEFT_RIGHT).rotate(270, expand=True)
-                    elif value == 8:
-                        image = image.rotate(90, expand=True)
-                    break
-    except (AttributeError, KeyError, TypeError):
-        # If there's any issue reading EXIF data, just return the original image
-        pass
-    
-    return image
+    Tk widgets may only be touched from the main thread, so workers just
+    produce PIL images and the launcher collects them with drain(). Every
+    call to load() or cancel() starts a new generation; results belonging to
+    an older generation are discarded.
+
+    Thumbnails go through the PyramidCache shared with the viewer. The
+    image a show would start on is decoded once for both its thumbnail and
+    its screen canvas (see prepare_start), ahead of the other thumbnails.
+
+    Pending thumbnails wait in a heap, visible rows first and then outwards.
+    Scrolling pushes the newly visible rows and their surroundings again,
+    ahead of everything queued before; entries for thumbnails already done
+    are dropped as they come up.
+    """
+
+    def __init__(self, cache, workers=None):
+        self.cache = cache
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.generation = 0
+        self.image_files = []
+        self.pending = set()
+        # (-visibility stamp, distance from the visible rows, index)
+        self.queue = []
+        self.stamp = 0
+        self.visible = (0, 0)
+        self.start_job = None
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        for _ in range(self.workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def load(self, image_files, visible=(0, 0)):
+        """Queue thumbnails for image_files, replacing any previous request"""
+        with self.lock:
+            self.generation += 1
+            self.image_files = list(image_files)
+            self.pending = set(range(len(self.image_files)))
+            self.visible = visible
+            self._rebuild_queue()
+            self.start_job = None
+            self.wakeup.notify_all()
+
+    def prepare_start(self, idx, size, quality):
+        """Decode image idx of the current request at the show's size, thumbnail included, before anything else"""
+        with self.lock:
+            if idx < len(self.image_files):
+                self.start_job = (idx, size, quality)
+                self.wakeup.notify_all()
+
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            self.image_files = []
+            self.pending = set()
+            self.queue = []
+            self.start_job = None
+
+    def set_visible(self, visible):
+        with self.lock:
+            if visible == self.visible:
+                return
+            self.visible = visible
+            if len(self.queue) > 2 * len(self.image_files):
+                # Mostly entries left behind by scrolling; start afresh
+                self._rebuild_queue()
+                return
+            self.stamp += 1
+            first, last = visible
+            span = last - first + 1
+            for idx in range(max(0, first - span), min(len(self.image_files), last + span + 1)):
+                if idx in self.pending:
+                    heapq.heappush(self.queue, (-self.stamp, self._distance(idx), idx))
+
+    def _distance(self, idx):
+        first, last = self.visible
+        if idx < first:
+            return first - idx
+        if idx > last:
+            return idx - last
+        return 0
+
+    def _rebuild_queue(self):
+        # Called with the lock held
+        self.stamp = 0
+        self.queue = [(0, self._distance(idx), idx) for idx in self.pending]
+        heapq.heapify(self.queue)
+
+    def drain(self):
+        """Return (index, image) pairs finished since the last call"""
+        finished = []
+        while True:
+            try:
+                generation, idx, img = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.generation:
+                finished.append((idx, img))
+        return finished
+
+    def _next_job(self):
+        if self.start_job is not None:
+            idx, size, quality = self.start_job
+            self.start_job = None
+            self.pending.discard(idx)
+            return self.generation, idx, self.image_files[idx], (size, quality)
+        # Visible rows first, then outwards from the visible window
+        while True:
+            idx = heapq.heappop(self.queue)[2]
+            if idx in self.pending:
+                self.pending.discard(idx)
+                return self.generation, idx, self.image_files[idx], None
+
+    def _worker(self):
+        while True:
+            with self.lock:
+                while not self.pending and self.start_job is None:
+                    self.wakeup.wait()
+                generation, idx, img_path, start = self._next_job()
+            try:
+                if start is not None:
+                    size, quality = start
+                    # One decode for the canvas the show opens with and the thumbnail
+                    self.cache.load_canvas(img_path, size, quality)
+                thumb = self.cache.load_thumbnail(img_path)
+            except Exception as e:
+                print(f"Error loading thumbnail for {img_path}: {e}")
+                continue
+            if generation == self.generation:
+                self.results.put((generation, idx, thumb))
 
 class FullscreenImageViewer:
     def __init__(self, image_files, display_time_ms=5000, dissolve_time_ms=1000, dissolve_frames=30, 
                  launcher_app=None, directory=None, display_time=None, dissolve_time=None,
-                 display_time_str="", dissolve_time_str="", start_idx=0, loop_enabled=True):
+                 display_time_str="", dissolve_time_str="", start_idx=0, loop_enabled=True,
+                 quality=DEFAULT_QUALITY, transition=DEFAULT_TRANSITION, display_profile=None,
+                 frame_cache_path=None, shuffle=False, seed=None, prefetch_depth=2, profiler=None,
+                 dissolve_scale="auto", pyramid_cache=None, quarantine=None,
+                 load_timeout=DEFAULT_LOAD_TIMEOUT, metrics=None, workers=1):
         self.image_files = image_files
+        self.profiler = profiler
         self.display_time_ms = display_time_ms
         self.dissolve_time_ms = dissolve_time_ms
         self.dissolve_frames = dissolve_frames
         self.img_idx = start_idx
+        # Play position, continuing across loops; the order maps it to an image
+        self.order = create_order(len(image_files), shuffle, seed)
+        self.position = self.order.position_of(start_idx)
+        if shuffle:
+            print(f"Shuffling with seed {self.order.seed}")
+        # Upcoming slides are rendered in the background while the current one shows
+        self.prefetch_depth = prefetch_depth
         self.timer_id = None
         self.dissolve_id = None
         self.paused = False
         self.loop_enabled = loop_enabled
+        self.navigation = Navigation(self, loop_enabled)
         
         # Store launcher app reference and settings for returning
         self.launcher_app = launcher_app
@@ -457,12 +691,20 @@ class FullscreenImageViewer:
         self.root.update_idletasks()
         self.root.update()  # Additional update to ensure full initialization
         self.screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        # Loading, caching and transition frames; this class only puts them on screen
+        self.renderer = SlideRenderer(image_files, self.screen_size, quality, transition,
+                                      display_profile, frame_cache_path, dissolve_scale, pyramid_cache,
+                                      quarantine, load_timeout, metrics=metrics, prefetch_workers=workers)
+        # Reused for every transition frame instead of a new Tk image per frame
+        self.transition_photo = None
+        self.zoomed_photo = None
         
         # Bind keyboard events
         self.root.bind("<Right>", self.next_image)
         self.root.bind("<Left>", self.prev_image)
         self.root.bind("<space>", self.toggle_pause)
         self.root.bind("<Escape>", self.return_to_launcher)
+        self.navigation.bind(self.root)
         
         # Show first image and start slideshow
         self.root.focus_force()  # Ensure window has focus
@@ -471,43 +713,6 @@ class FullscreenImageViewer:
         self.show_image(self.img_idx, dissolve=False)
         self.root.mainloop()
 
-    def prepare_canvas(self, img_path):
-        """Resize image with aspect ratio, center it on black canvas"""
-        try:
-            print(f"Loading image: {img_path}")
-            img = Image.open(img_path).convert('RGBA')
-            print(f"Image loaded successfully: {img.size}, mode: {img.mode}")
-            # Apply EXIF orientation before processing
-            img = apply_exif_orientation(img)
-            screen_width, screen_height = self.screen_size
-            img_ratio = img.width / img.height
-            screen_ratio = screen_width / screen_height
-
-            if img_ratio > screen_ratio:
-                new_width = screen_width
-                new_height = int(screen_width / img_ratio)
-            else:
-                new_height = screen_height
-                new_width = int(screen_height * img_ratio)
-
-            print(f"Resizing to: {new_width}x{new_height}")
-            img = img.resize((new_width, new_height), Image.LANCZOS)
-            # Create RGBA canvas (black background)
-            canvas = Image.new('RGBA', (screen_width, screen_height), (0, 0, 0, 255))
-            offset_x = (screen_width - new_width) // 2
-            offset_y = (screen_height - new_height) // 2
-            canvas.paste(img, (offset_x, offset_y), mask=img)
-            print(f"Canvas prepared successfully: {canvas.size}, mode: {canvas.mode}")
-            return canvas
-        except Exception as e:
-            print(f"Error loading image {img_path}: {e}")
-            import traceback
-            traceback.print_exc()
-            # Return a black canvas if image loading fails
-            screen_width, screen_height = self.screen_size
-            print(f"Creating fallback black canvas: {screen_width}x{screen_height}")
-            return Image.new('RGB', (screen_width, screen_height), (0, 0, 0))
-
     def show_image(self, idx, dissolve=True):
         print(f"Showing image {idx + 1}/{len(self.image_files)}: {self.image_files[idx]}")
         
@@ -520,17 +725,25 @@ class FullscreenImageViewer:
             
         img_path = self.image_files[idx]
         self.root.title(f"{img_path.name} ({idx+1}/{len(self.image_files)})")
+        if self.profiler:
+            self.profiler.slide_shown()
+        self.renderer.metrics.slide_shown()
         
         try:
-            new_canvas = self.prepare_canvas(img_path)
+            dissolve = dissolve and getattr(self, "current_canvas", None) is not None
+            slide = self.renderer.take_slide(idx)
+            new_canvas = slide[0]
             if new_canvas is None:
                 print(f"Failed to prepare canvas for {img_path}")
                 return
                 
-            if dissolve and hasattr(self, "current_canvas") and self.current_canvas is not None:
+            if dissolve:
                 self.dissolving = True
                 self.dissolve_step = 0
                 self.next_img_canvas = new_canvas
+                self.renderer.start_transition(self.current_canvas, slide,
+                                               self.dissolve_time_ms / max(1, self.dissolve_frames))
+                self.transition_start = time.perf_counter()
                 self._dissolve_images()
             else:
                 print(f"Displaying image directly: {img_path.name}")
@@ -538,12 +751,48 @@ class FullscreenImageViewer:
                 self.current_canvas = new_canvas
                 if not self.paused:
                     self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+                self.schedule_prefetch()
         except Exception as e:
             print(f"Error in show_image: {e}")
             # Try to continue with next image
             if not self.paused:
                 self.timer_id = self.root.after(1000, self.next_image)
 
+    def present_frame(self, frame, factor=1):
+        """Put a transition frame on screen, zooming frames reduced by factor up to full size in Tk"""
+        if self.transition_photo is None or self.transition_photo.width() != frame.width \
+                or self.transition_photo.height() != frame.height:
+            self.transition_photo = ImageTk.PhotoImage(frame)
+        else:
+            self.transition_photo.paste(frame)
+        if factor == 1:
+            return self.transition_photo
+        width, height = self.screen_size
+        if self.zoomed_photo is None:
+            self.zoomed_photo = tk.PhotoImage(master=self.root, width=width, height=height)
+        # Tk's own nearest-neighbour zoom: no full-resolution pixels pass through PIL
+        self.zoomed_photo.tk.call(self.zoomed_photo, "copy", self.transition_photo,
+                                  "-zoom", factor, factor, "-to", 0, 0, width, height,
+                                  "-compositingrule", "set")
+        return self.zoomed_photo
+
+    def upcoming_indices(self, depth=None):
+        """Image indices of the next depth (default prefetch_depth) slides in play order"""
+        return self.order.upcoming(self.position, depth or self.prefetch_depth, self.renderer.playable,
+                                   None if self.loop_enabled else len(self.image_files))
+
+    def schedule_prefetch(self):
+        """Start rendering the upcoming slides and drop any that are no longer upcoming"""
+        # File contents are read further ahead than slides are rendered
+        self.renderer.read_ahead_upcoming(self.upcoming_indices(self.renderer.read_ahead_files))
+        self.renderer.prefetch(self.upcoming_indices(), current=self.img_idx)
+
+    def stop_prefetch(self):
+        self.renderer.close()
+        self.navigation.close()
+        # The launcher reopens an archive if it shows it again
+        close_archives()
+
     def safe_create_photoimage(self, pil_image):
         """Safely create a PhotoImage from PIL Image"""
         try:
@@ -570,27 +819,22 @@ class FullscreenImageViewer:
                 return None
 
     def _dissolve_images(self):
-        frames = self.dissolve_frames
-        step = self.dissolve_step
-        alpha = step / frames
+        """Show the next transition frame.
+
+        Progress is taken from the wall clock rather than the frame count, so
+        a frame that takes longer than its slot makes the transition drop
+        frames instead of running over dissolve_time_ms.
+        """
+        frame_start = time.perf_counter()
+        elapsed_ms = (frame_start - self.transition_start) * 1000
+        t = min(1.0, elapsed_ms / self.dissolve_time_ms) if self.dissolve_time_ms > 0 else 1.0
+        if t >= 1.0:
+            self._finish_transition()
+            return
         
         try:
-            blended = Image.blend(self.current_canvas, self.next_img_canvas, alpha)
-            
-            # Create PhotoImage safely
-            photo = self.safe_create_photoimage(blended)
-            if photo is None:
-                print("Failed to create photo during dissolve, skipping frame")
-                self.dissolve_step += 1
-                if self.dissolve_step < frames:
-                    self.dissolve_id = self.root.after(self.dissolve_time_ms // frames, self._dissolve_images)
-                else:
-                    self.display_img(self.next_img_canvas)
-                    self.current_canvas = self.next_img_canvas
-                    self.dissolving = False
-                    if not self.paused:
-                        self.timer_id = self.root.after(self.display_time_ms, self.next_image)
-                return
+            frame = self.renderer.transition_frame(t)
+            photo = self.present_frame(frame, self.renderer.active_scale)
             
             # Store multiple references
             self.photo = photo
@@ -601,23 +845,29 @@ class FullscreenImageViewer:
             # Force update to ensure the image is displayed
             self.label.update_idletasks()
             
-            if step < frames:
-                self.dissolve_step += 1
-                self.dissolve_id = self.root.after(self.dissolve_time_ms // frames, self._dissolve_images)
-            else:
-                self.display_img(self.next_img_canvas)
-                self.current_canvas = self.next_img_canvas
-                self.dissolving = False
-                if not self.paused:
-                    self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+            self.dissolve_step += 1
+            frame_ms = (time.perf_counter() - frame_start) * 1000
+            self.renderer.record_frame(frame_ms)
+            interval = self.dissolve_time_ms / self.dissolve_frames
+            self.dissolve_id = self.root.after(max(1, int(interval - frame_ms)), self._dissolve_images)
         except Exception as e:
-            print(f"Error in dissolve animation: {e}")
-            # Skip to final image if dissolve fails
-            self.display_img(self.next_img_canvas)
-            self.current_canvas = self.next_img_canvas
-            self.dissolving = False
-            if not self.paused:
-                self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+            print(f"Error in {self.renderer.transition_name} transition: {e}")
+            # Skip to final image if the transition fails
+            self._finish_transition()
+
+    def _finish_transition(self):
+        if self.dissolve_frames > 0:
+            self.renderer.finish_transition(self.dissolve_time_ms / self.dissolve_frames)
+            self.renderer.metrics.transition_finished((time.perf_counter() - self.transition_start) * 1000,
+                                                      self.dissolve_time_ms,
+                                                      self.dissolve_time_ms / self.dissolve_frames)
+        self.dissolve_id = None
+        self.display_img(self.next_img_canvas)
+        self.current_canvas = self.next_img_canvas
+        self.dissolving = False
+        if not self.paused:
+            self.timer_id = self.root.after(self.display_time_ms, self.next_image)
+        self.schedule_prefetch()
 
     def display_img(self, img):
         print(f"display_img called with image size: {img.size if img else 'None'}")
@@ -671,37 +921,53 @@ class FullscreenImageViewer:
                 print(f"Error with fallback display: {fallback_error}")
 
     def next_image(self, event=None):
+        if event is not None:
+            # Keyboard navigation is coalesced and never blocks on decoding
+            self.navigation.navigate(1)
+            return
         if self.dissolving:
             return
         
+        # Images that failed to load before are stepped over
+        position = self.renderer.playable_position(self.order, self.position + 1)
         # Check if we should loop or stop at the end
-        if self.img_idx >= len(self.image_files) - 1:
-            if self.loop_enabled:
-                self.img_idx = 0  # Loop back to first image
-            else:
-                # End of slideshow - stay on last image (don't advance or set timer)
-                return
-        else:
-            self.img_idx += 1
+        if not self.loop_enabled and position >= len(self.image_files):
+            # End of slideshow - stay on last image (don't advance or set timer)
+            return
+        self.position = position
+        self.img_idx = self.order.index_at(self.position)
             
         self.show_image(self.img_idx, dissolve=True)
 
     def prev_image(self, event=None):
+        if event is not None:
+            self.navigation.navigate(-1)
+            return
         if self.dissolving:
             return
             
+        position = self.renderer.playable_position(self.order, self.position - 1, -1)
         # Check if we should loop or stop at the beginning
-        if self.img_idx <= 0:
-            if self.loop_enabled:
-                self.img_idx = len(self.image_files) - 1  # Loop to last image
-            else:
-                # Beginning of slideshow - stay at first image
-                return
-        else:
-            self.img_idx -= 1
+        if not self.loop_enabled and position < 0:
+            # Beginning of slideshow - stay at first image
+            return
+        self.position = position
+        self.img_idx = self.order.index_at(self.position)
             
         self.show_image(self.img_idx, dissolve=True)
 
+    def interrupt(self):
+        """Stop the slide timer and jump any running transition to its end"""
+        if self.timer_id:
+            self.root.after_cancel(self.timer_id)
+            self.timer_id = None
+        if self.dissolving:
+            if self.dissolve_id:
+                self.root.after_cancel(self.dissolve_id)
+                self.dissolve_id = None
+            self.current_canvas = self.next_img_canvas
+            self.dissolving = False
+
     def toggle_pause(self, event=None):
         """Toggle pause/resume of the slideshow"""
         if self.dissolving:
@@ -724,6 +990,10 @@ class FullscreenImageViewer:
             self.root.after_cancel(self.timer_id)
         if self.dissolve_id:
             self.root.after_cancel(self.dissolve_id)
+        self.stop_prefetch()
+        if self.profiler:
+            # The launcher keeps running, so write what this slideshow collected now
+            self.profiler.write_report()
         
         # Destroy the slideshow window
         self.root.destroy()
@@ -744,6 +1014,7 @@ class FullscreenImageViewer:
             self.root.after_cancel(self.timer_id)
         if self.dissolve_id:
             self.root.after_cancel(self.dissolve_id)
+        self.stop_prefetch()
         
         # Destroy the slideshow window
         self.root.destroy()
@@ -757,5 +1028,54 @@ class FullscreenImageViewer:
                 pass
 
 if __name__ == "__main__":
-    app = SlideshowApp()
-    app.run()
+    parser = argparse.ArgumentParser(description="SlideShow launcher")
+    parser.add_argument("--profile", nargs="?", const=".", metavar="DIR",
+                        help="Profile the session (cProfile + tracemalloc) and write a report into DIR (default: .)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write health metrics to PATH every --metrics-interval seconds: JSON if it ends "
+                             "in .json, Prometheus text format otherwise")
+    parser.add_argument("--metrics-listen", metavar="ADDRESS",
+                        help="Serve health metrics in Prometheus text format on HOST:PORT or a socket path")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_INTERVAL, metavar="SECONDS",
+                        help=f"Seconds between writes of the --metrics file (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument("--frames", type=int, metavar="N",
+                        help="Frames per transition (default: calibrated for this machine, else 30)")
+    parser.add_argument("--prefetch-depth", type=int, metavar="N",
+                        help="Upcoming slides rendered in the background (default: calibrated, else 2)")
+    parser.add_argument("--workers", type=int, help="Threads rendering upcoming slides (default: calibrated, else 1)")
+    parser.add_argument("--recalibrate", action="store_true",
+                        help="Measure this machine again instead of using its saved calibration")
+    parser.add_argument("--no-calibrate", action="store_true",
+                        help="Use the fixed defaults instead of settings calibrated for this machine")
+    # Ignore anything else the OS passes to a bundled app (e.g. -psn_* on macOS)
+    args, _ = parser.parse_known_args()
+    if args.metrics_interval <= 0:
+        parser.error("--metrics-interval must be a positive number of seconds")
+    if (args.frames is not None and args.frames < 1) or (args.workers is not None and args.workers < 1):
+        parser.error("--frames and --workers must be at least 1")
+    if args.prefetch_depth is not None and args.prefetch_depth < 0:
+        parser.error("--prefetch-depth cannot be negative")
+    metrics = Metrics()
+    exporter = None
+    if args.metrics or args.metrics_listen:
+        exporter = MetricsExporter(metrics, args.metrics, args.metrics_listen, args.metrics_interval)
+        try:
+            exporter.open()
+        except (OSError, ValueError) as e:
+            print(f"Error: could not open metrics socket {args.metrics_listen}: {e}")
+            sys.exit(1)
+        exporter.start()
+    profiler = SessionProfiler(args.profile) if args.profile else None
+    calibration = None if args.no_calibrate else Calibration(default_calibration_path())
+    overrides = {"frames": args.frames, "prefetch_depth": args.prefetch_depth, "workers": args.workers}
+    app = SlideshowApp(profiler=profiler, metrics=metrics, calibration=calibration,
+                       recalibrate=args.recalibrate, overrides=overrides)
+    if profiler:
+        profiler.start()
+    try:
+        app.run()
+    finally:
+        if profiler:
+            profiler.stop()
+        if exporter:
+            exporter.close()
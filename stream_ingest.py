@@ -0,0 +1,263 @@
+"""
+Streaming ingest for SlideShow
+Plays images as they are pushed to the show - from a photo booth, a tethered
+camera or any script - instead of listing a directory once.
+
+Sources:
+    -                    standard input
+    an existing FIFO     a named pipe (mkfifo); reopened whenever a writer
+                         closes it, so producers can come and go
+    HOST:PORT            a TCP socket listened on (any number of clients)
+    any other path       a Unix socket created there and listened on
+
+Every source carries the same records, one after another:
+    /path/to/image.jpg\\n          a line naming an image file to show
+    IMAGE <length>\\n<bytes>       an encoded image (JPEG, PNG, ...) sent inline
+
+e.g.  ls -1 /captures/*.jpg > pipe
+      printf 'IMAGE %d\\n' "$(stat -c %s a.jpg)" | cat - a.jpg | nc host 9000
+
+Readers hand records to a single decode thread, which renders them with the
+show's SlideRenderer into a queue of ready slides for the Tk thread. Both
+queues hold at most capacity items, so a producer faster than the show
+cannot exhaust memory. What happens when they are full is the policy:
+
+    block         readers stop reading, which blocks the producer through
+                  the pipe or socket (backpressure); nothing is lost
+    drop-oldest   the oldest waiting item is discarded, so the show stays
+                  live and always shows the most recent arrivals
+"""
+
+import io
+import itertools
+import os
+import queue
+import socket
+import stat
+import sys
+import threading
+from pathlib import Path
+
+from playback_sync import parse_address
+
+QUEUE_POLICIES = ("block", "drop-oldest")
+DEFAULT_QUEUE_SIZE = 4
+# Largest inline image accepted, so a corrupt length cannot allocate gigabytes
+MAX_IMAGE_BYTES = 256 * 1024 * 1024
+
+class StreamedImage:
+    """An image that arrived as bytes. Stands in for a Path in the viewer's image list."""
+
+    def __init__(self, number, size, origin):
+        self.name = f"streamed-{number:05d}"
+        self.size = size
+        self.origin = origin
+
+    @property
+    def suffix(self):
+        return ""
+
+    def __str__(self):
+        return f"{self.name} ({self.size} bytes from {self.origin})"
+
+class BoundedQueue:
+    """A queue of at most maxsize items that either blocks or drops the oldest item when full"""
+
+    def __init__(self, maxsize, policy, stopped):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Choose from: {', '.join(QUEUE_POLICIES)}")
+        self.queue = queue.Queue(maxsize)
+        self.policy = policy
+        self.stopped = stopped
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        """Add item; returns the item dropped to make room for it, if any"""
+        if self.policy == "block":
+            while not self.stopped.is_set():
+                try:
+                    self.queue.put(item, timeout=0.5)
+                    return None
+                except queue.Full:
+                    continue
+            return None
+        with self.lock:
+            dropped = None
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return dropped
+                except queue.Full:
+                    try:
+                        dropped = self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None if there is none within timeout"""
+        try:
+            if timeout is None:
+                return self.queue.get_nowait()
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+def is_fifo(path):
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+def read_records(stream, origin):
+    """Yield ("path", str) and ("data", bytes) records from the binary file object stream until EOF"""
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(b"IMAGE "):
+            try:
+                length = int(line[6:])
+            except ValueError:
+                print(f"Ingest: bad record header from {origin}: {line[:60]!r}")
+                continue
+            if not 0 < length <= MAX_IMAGE_BYTES:
+                print(f"Ingest: refusing a {length} byte image from {origin}; closing the stream")
+                return
+            data = stream.read(length)
+            if len(data) < length:
+                print(f"Ingest: {origin} closed in the middle of an image")
+                return
+            yield "data", data
+        else:
+            yield "path", os.path.expanduser(line.decode("utf-8", "replace"))
+
+class ImageStream:
+    """Reads image records from source and renders them in the background.
+
+    open() claims the source and start() begins reading. get() returns the
+    next (image, slide) pair for the viewer, where image is a Path or
+    StreamedImage for the title and slide is what
+    SlideRenderer.render_slide returns.
+    """
+
+    def __init__(self, source, capacity=DEFAULT_QUEUE_SIZE, policy="block"):
+        self.source = source
+        self.policy = policy
+        self.stopped = threading.Event()
+        self.records = BoundedQueue(capacity, policy, self.stopped)
+        self.slides = BoundedQueue(capacity, policy, self.stopped)
+        self.renderer = None
+        self.server = None
+        self.bound_path = None
+        # Numbers the images that arrive as bytes; shared by all readers
+        self.numbers = itertools.count(1)
+        self.failed = 0
+
+    def open(self):
+        """Open or listen on the source. Raises OSError or ValueError if it cannot be used."""
+        if self.source == "-" or is_fifo(self.source):
+            return
+        family, address = parse_address(self.source)
+        if family == socket.AF_INET:
+            self.server = socket.create_server(address)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(address)
+            self.server.listen()
+            self.bound_path = address
+
+    def start(self, renderer):
+        """Start reading, rendering with renderer"""
+        self.renderer = renderer
+        threading.Thread(target=self._decode, daemon=True).start()
+        if self.server is not None:
+            threading.Thread(target=self._accept, daemon=True).start()
+            print(f"Ingest: listening on {self.server.getsockname()} ({self.policy})")
+        elif self.source == "-":
+            self._start_reader(sys.stdin.buffer, "stdin")
+            print(f"Ingest: reading from stdin ({self.policy})")
+        else:
+            threading.Thread(target=self._read_fifo, daemon=True).start()
+            print(f"Ingest: reading from named pipe {self.source} ({self.policy})")
+
+    def _accept(self):
+        while not self.stopped.is_set():
+            try:
+                connection, peer = self.server.accept()
+            except OSError:
+                return
+            origin = peer or "socket client"
+            print(f"Ingest: {origin} connected")
+            self._start_reader(connection.makefile("rb"), origin, connection)
+
+    def _start_reader(self, stream, origin, connection=None):
+        threading.Thread(target=self._read, args=(stream, origin, connection), daemon=True).start()
+
+    def _read_fifo(self):
+        # Opening a FIFO waits for a writer; each writer's EOF is followed by the next one
+        while not self.stopped.is_set():
+            try:
+                with open(self.source, "rb") as stream:
+                    self._read(stream, self.source)
+            except OSError as e:
+                print(f"Ingest: cannot read {self.source}: {e}")
+                return
+
+    def _read(self, stream, origin, connection=None):
+        try:
+            for kind, value in read_records(stream, origin):
+                if self.stopped.is_set():
+                    break
+                if kind == "data":
+                    record = (StreamedImage(next(self.numbers), len(value), origin), value)
+                else:
+                    record = (value, None)
+                if self.records.put(record) is not None:
+                    print("Ingest: queue full, dropped the oldest waiting image")
+        except OSError as e:
+            print(f"Ingest: reading from {origin} failed: {e}")
+        finally:
+            if connection is not None:
+                connection.close()
+                print(f"Ingest: {origin} disconnected")
+
+    def _decode(self):
+        while not self.stopped.is_set():
+            record = self.records.get(timeout=0.5)
+            if record is None:
+                continue
+            image, data = record
+            if data is None:
+                image = Path(image)
+                if not image.is_file():
+                    print(f"Ingest: no such image file {image}")
+                    self.failed += 1
+                    continue
+            print(f"Ingest: rendering {image}")
+            slide = self.renderer.render_slide(image if data is None else io.BytesIO(data))
+            if self.slides.put((image, slide)) is not None:
+                print("Ingest: show is behind, dropped the oldest rendered image")
+
+    def get(self):
+        """Return the next rendered (image, slide), or None if none is ready. Does not block."""
+        return self.slides.get()
+
+    def close(self):
+        self.stopped.set()
+        if self.server is not None:
+            self.server.close()
+        if self.bound_path:
+            try:
+                os.unlink(self.bound_path)
+            except OSError:
+                pass
+        dropped = self.records.dropped + self.slides.dropped
+        if dropped or self.failed:
+            print(f"Ingest: {dropped} images dropped, {self.failed} missing")
@@ -0,0 +1,157 @@
+"""
+Transition effects for SlideShow
+Each transition renders the intermediate frames between two screen-sized canvases.
+
+A transition is created once per screen size, so anything that depends only
+on the size (masks, ramps) is built up front. prepare() is called once per
+slide change and frame() once per displayed frame; frame() is kept to a
+fixed amount of full-screen pixel work so its cost does not depend on the
+source images.
+"""
+
+from PIL import Image
+
+def to_rgb(img):
+    """Return img as RGB. Canvases are opaque, so dropping alpha is lossless."""
+    if img.mode == "RGB":
+        return img
+    return img.convert("RGB")
+
+def ease_in_out(t):
+    """Smoothstep easing for motion effects"""
+    return t * t * (3 - 2 * t)
+
+class Transition:
+    """Base class for transitions between two canvases"""
+
+    name = None
+    # How much larger than the screen the incoming image should be rendered.
+    # Effects that zoom need the extra resolution to avoid upscaling.
+    oversample = 1.0
+
+    def __init__(self, size):
+        self.size = size
+        self.from_img = None
+        self.to_img = None
+
+    def prepare(self, from_canvas, to_canvas, to_source=None):
+        """Set up a transition from from_canvas to to_canvas.
+
+        to_source is an optional oversampled rendering of the incoming image
+        (see oversample); effects that do not need it ignore it.
+        """
+        self.from_img = to_rgb(from_canvas)
+        self.to_img = to_rgb(to_canvas)
+
+    def frame(self, t):
+        """Return the RGB frame at progress t (0.0 = from_canvas, 1.0 = to_canvas)"""
+        raise NotImplementedError
+
+class Dissolve(Transition):
+    """Crossfade between the two canvases"""
+
+    name = "dissolve"
+
+    def frame(self, t):
+        return Image.blend(self.from_img, self.to_img, t)
+
+class Wipe(Transition):
+    """Reveal the incoming canvas from left to right behind a soft edge"""
+
+    name = "wipe"
+
+    def __init__(self, size):
+        super().__init__(size)
+        width, height = size
+        self.edge = max(1, width // 16)
+        # The soft edge is the only part that needs blending; its mask is
+        # built once and everything either side of it is a plain copy.
+        ramp = Image.linear_gradient("L").rotate(-90, expand=True)
+        self.mask = ramp.resize((self.edge, height), Image.BILINEAR)
+
+    def frame(self, t):
+        width, height = self.size
+        # Left edge of the ramp travels from -edge (nothing revealed) to width
+        edge_x = int(round(ease_in_out(t) * (width + self.edge))) - self.edge
+        frame = self.from_img.copy()
+        if edge_x > 0:
+            frame.paste(self.to_img.crop((0, 0, edge_x, height)), (0, 0))
+        band = (edge_x, 0, edge_x + self.edge, height)
+        frame.paste(self.to_img.crop(band), band, self.mask)
+        return frame
+
+class Slide(Transition):
+    """Push the outgoing canvas off to the left with the incoming one"""
+
+    name = "slide"
+
+    def frame(self, t):
+        width, _ = self.size
+        offset = int(round(ease_in_out(t) * width))
+        frame = Image.new("RGB", self.size)
+        frame.paste(self.from_img, (-offset, 0))
+        frame.paste(self.to_img, (width - offset, 0))
+        return frame
+
+class KenBurns(Transition):
+    """Fade in the incoming image while it pans and zooms out to its resting framing.
+
+    The incoming image is rendered once at oversample times the screen size;
+    each frame is then a single crop-and-scale of that source (plus a blend
+    while fading in), so the zoom never upscales and never re-reads the
+    original file.
+    The motion ends exactly on the regular full-screen framing.
+    """
+
+    name = "kenburns"
+    oversample = 1.15
+    # Fraction of the transition spent fading in from the outgoing image
+    fade = 0.4
+    # Start framings cycle through these focal points (fractions of the slack)
+    focal_points = [(0.5, 0.5), (0.0, 0.0), (1.0, 1.0), (1.0, 0.0), (0.0, 1.0)]
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.count = 0
+        self.source = None
+
+    def prepare(self, from_canvas, to_canvas, to_source=None):
+        super().prepare(from_canvas, to_canvas)
+        self.source = to_rgb(to_source) if to_source is not None else self.to_img
+        self.focus = self.focal_points[self.count % len(self.focal_points)]
+        self.count += 1
+
+    def frame(self, t):
+        width, height = self.size
+        eased = ease_in_out(t)
+        # Visible window in screen coordinates, shrinking zoom from oversample to 1
+        zoom = self.oversample + (1 - self.oversample) * eased
+        view_width = width / zoom
+        view_height = height / zoom
+        left = (width - view_width) * self.focus[0]
+        top = (height - view_height) * self.focus[1]
+        # Crop-and-scale straight from the (possibly oversampled) source;
+        # a boxed resize is about twice as fast as a general affine transform
+        scale = self.source.width / width
+        box = (left * scale, top * scale, (left + view_width) * scale, (top + view_height) * scale)
+        moving = self.source.resize(self.size, Image.BILINEAR, box=box)
+        # Fade in over the first part of the motion, then it is the zoom alone
+        alpha = t / self.fade
+        if alpha >= 1.0:
+            return moving
+        return Image.blend(self.from_img, moving, alpha)
+
+def reduce_for_transition(img, factor):
+    """Shrink img by an integer factor for reduced-resolution transition frames"""
+    if img is None or factor == 1:
+        return img
+    return img.reduce(factor)
+
+TRANSITIONS = {cls.name: cls for cls in (Dissolve, Wipe, Slide, KenBurns)}
+DEFAULT_TRANSITION = "dissolve"
+
+def create_transition(name, size):
+    """Create the transition called name for a screen of the given size"""
+    if name not in TRANSITIONS:
+        raise ValueError(f"Unknown transition '{name}'. Choose from: {', '.join(TRANSITIONS)}")
+    return TRANSITIONS[name](size)